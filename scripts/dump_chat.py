@@ -1,28 +1,55 @@
 import argparse
 import asyncio
-import json
+import gzip
 
 from telethon import TelegramClient
 
+from src.utils import json_dumps
+
+
+WRITE_BATCH_SIZE = 1000
+
+
+def _open_output(output):
+    if output.endswith('.gz'):
+        # Level 1 keeps CPU cost low; chat text still compresses several-fold.
+        return gzip.open(output, 'wt', encoding='utf-8', compresslevel=1)
+    return open(output, 'w', encoding='utf-8')
+
 
 async def dump_chat_history(api_id, api_hash, chat, output):
     async with TelegramClient('me', api_id, api_hash) as client:
         messages = client.iter_messages(chat, limit=None, reverse=True)
         counter = 0
-        with open(output, 'w', encoding='utf-8') as f:
+        # get_sender() is an API round trip on a cold entity cache; a chat has far
+        # fewer senders than messages.
+        sender_cache = {}
+        buf = []
+        with _open_output(output) as f:
             async for msg in messages:
                 if msg.message == "" or msg.message is None:
                     continue
                 if counter % 1000 == 0:
                     print(f'Processed {counter} messages...')
-                sender = await msg.get_sender()
-                sender_name = sender.first_name or sender.username
+                sender_id = msg.sender_id
+                if sender_id in sender_cache:
+                    sender_name = sender_cache[sender_id]
+                else:
+                    sender = await msg.get_sender()
+                    sender_name = sender.first_name or sender.username
+                    sender_cache[sender_id] = sender_name
                 data = {
                         'sender': sender_name,
                         'text': msg.message,
                     }
-                f.write(json.dumps(data, ensure_ascii=False) + '\n')
+                buf.append(json_dumps(data) + '\n')
+                if len(buf) >= WRITE_BATCH_SIZE:
+                    # Keep disk/compression work off the loop driving the fetches.
+                    await asyncio.to_thread(f.write, ''.join(buf))
+                    buf.clear()
                 counter += 1
+            if buf:
+                await asyncio.to_thread(f.write, ''.join(buf))
 
 
 def main():
@@ -30,7 +57,7 @@ def main():
     parser.add_argument('--api-id', required=True, help='Telegram API ID')
     parser.add_argument('--api-hash', required=True, help='Telegram API hash')
     parser.add_argument('--chat', required=True, help='Chat username or ID')
-    parser.add_argument('--output', required=True, help='Output JSONL file')
+    parser.add_argument('--output', required=True, help='Output JSONL file (gzip-compressed if it ends with .gz)')
     args = parser.parse_args()
 
     asyncio.run(dump_chat_history(args.api_id, args.api_hash, args.chat, args.output))
@@ -1,18 +1,92 @@
+import functools
+import hashlib
 import json
 import logging
-from datetime import date, datetime, timedelta
-from typing import Any, Dict, Optional, Union
+import os
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import httplib2  # type: ignore[import-untyped]
 import tzlocal
+from google.auth.exceptions import GoogleAuthError
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from googleapiclient.errors import Error as GoogleApiClientError  # type: ignore[import-untyped]
 
 from src import config
 
 SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
+# Google Calendar accepts at most 50 calls per batch request.
+_BATCH_MAX_REQUESTS = 50
+# Failures of the batch request as a whole (HTTP, transport, or credential refresh).
+_BATCH_REQUEST_ERRORS = (
+    GoogleApiClientError,
+    GoogleAuthError,
+    httplib2.HttpLib2Error,
+    OSError,
+)
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=4)
+def _local_timezone_for(tz_env: Optional[str]) -> tzinfo:
+    # tzlocal caches its own answer for the life of the process, so resolve an
+    # explicit TZ here; otherwise (or for values like a file path) defer to it.
+    if tz_env:
+        try:
+            return ZoneInfo(tz_env.lstrip(":"))
+        except (ValueError, ZoneInfoNotFoundError):
+            pass
+    return tzlocal.get_localzone()
+
+
+# Discovery clients are expensive to build; share them across CalendarProvider
+# instances. Keyed by (path, mtime) so a rotated key file is picked up, or by a
+# digest of the inline JSON so the secret itself is not kept as a cache key.
+_SERVICES: Dict[Tuple[Any, ...], Any] = {}
+_SERVICES_MAX_ENTRIES = 8
+
+
+def _cached_service(key: Tuple[Any, ...], load_credentials: Callable[[], Any]) -> Any:
+    service = _SERVICES.get(key)
+    if service is None:
+        if len(_SERVICES) >= _SERVICES_MAX_ENTRIES:
+            _SERVICES.clear()
+        service = build("calendar", "v3", credentials=load_credentials())
+        _SERVICES[key] = service
+    return service
+
+
+def local_timezone() -> tzinfo:
+    # tzlocal inspects TZ, /etc/timezone and /etc/localtime on every call; resolve
+    # once per TZ value instead of on each event.
+    return _local_timezone_for(os.environ.get("TZ"))
+
+
+def _create_error_message(exc: Exception) -> str:
+    error_msg = f"Failed to create calendar event: {exc}"
+    if hasattr(exc, "content"):
+        error_msg += f"\nError details: {getattr(exc, 'content')}"
+    return error_msg
+
+
+class CalendarBatchError(RuntimeError):
+    """Raised by create_events when some inserts failed.
+
+    `created` holds the events that were inserted, so a retry can skip them;
+    `failed` maps the index of each failed input item to its error. The message
+    describes the first failure.
+    """
+
+    def __init__(
+        self, created: List[Dict[str, Any]], failed: Dict[int, Exception]
+    ) -> None:
+        super().__init__(_create_error_message(failed[min(failed)]))
+        self.created = created
+        self.failed = failed
+
+
 class CalendarProvider:
     def __init__(self) -> None:
         self.service = None
@@ -22,19 +96,28 @@ class CalendarProvider:
         settings = config.get_settings()
         try:
             if settings.google_credentials_path:
-                credentials = service_account.Credentials.from_service_account_file(
-                    settings.google_credentials_path,
-                    scopes=SCOPES,
+                credentials_path = settings.google_credentials_path
+                self.service = _cached_service(
+                    ("path", credentials_path, os.path.getmtime(credentials_path)),
+                    lambda: service_account.Credentials.from_service_account_file(
+                        credentials_path,
+                        scopes=SCOPES,
+                    ),
                 )
             elif settings.google_credentials_json:
-                credentials_info = json.loads(settings.google_credentials_json)
-                credentials = service_account.Credentials.from_service_account_info(
-                    credentials_info,
-                    scopes=SCOPES,
+                credentials_json = settings.google_credentials_json
+                self.service = _cached_service(
+                    (
+                        "json",
+                        hashlib.sha256(credentials_json.encode("utf-8")).hexdigest(),
+                    ),
+                    lambda: service_account.Credentials.from_service_account_info(
+                        json.loads(credentials_json),
+                        scopes=SCOPES,
+                    ),
                 )
             else:
                 raise RuntimeError("Missing Google Calendar credentials.")
-            self.service = build("calendar", "v3", credentials=credentials)
         except json.JSONDecodeError as exc:
             raise RuntimeError("GOOGLE_CREDENTIALS_JSON is not valid JSON.") from exc
         except Exception as exc:
@@ -53,10 +136,11 @@ class CalendarProvider:
     def _ensure_timezone(self, value: datetime) -> datetime:
         if value.tzinfo is not None:
             return value
-        return value.replace(tzinfo=tzlocal.get_localzone())
+        return value.replace(tzinfo=local_timezone())
 
-    def create_event(
+    def _build_event_body(  # pylint: disable=too-many-arguments
         self,
+        *,
         title: str,
         is_all_day: bool,
         start_time: Union[datetime, date],
@@ -64,13 +148,6 @@ class CalendarProvider:
         location: Optional[str] = None,
         description: Optional[str] = None,
     ) -> Dict[str, Any]:
-        if self.service is None:
-            raise RuntimeError("Calendar service is not initialized")
-
-        settings = config.get_settings()
-        if not settings.google_calendar_id:
-            raise RuntimeError("GOOGLE_CALENDAR_ID is required to create events")
-
         event: Dict[str, Any] = {"summary": title}
         if is_all_day:
             start_date, final_date = self._all_day_bounds(start_time)
@@ -81,7 +158,7 @@ class CalendarProvider:
                 raise ValueError("start_time must be datetime for non all-day events")
             start_dt = self._ensure_timezone(start_time)
             end_dt = self._ensure_timezone(end_time or (start_dt + timedelta(hours=1)))
-            tz_name = str(start_dt.tzinfo or tzlocal.get_localzone())
+            tz_name = str(start_dt.tzinfo or local_timezone())
             event["start"] = {"dateTime": start_dt.isoformat(), "timeZone": tz_name}
             event["end"] = {"dateTime": end_dt.isoformat(), "timeZone": tz_name}
 
@@ -89,23 +166,100 @@ class CalendarProvider:
             event["location"] = location
         if description:
             event["description"] = description
+        return event
+
+    def _require_service(self) -> Tuple[Any, str]:
+        """Return the calendar service and the target calendar id."""
+        if self.service is None:
+            raise RuntimeError("Calendar service is not initialized")
+
+        settings = config.get_settings()
+        if not settings.google_calendar_id:
+            raise RuntimeError("GOOGLE_CALENDAR_ID is required to create events")
+        return self.service, settings.google_calendar_id
 
-        logger.debug(
-            "Creating Google Calendar event",
-            extra={"calendar_id": settings.google_calendar_id, "event": event},
+    def create_event(
+        self,
+        title: str,
+        is_all_day: bool,
+        start_time: Union[datetime, date],
+        end_time: Optional[datetime] = None,
+        location: Optional[str] = None,
+        description: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        service, calendar_id = self._require_service()
+        event = self._build_event_body(
+            title=title,
+            is_all_day=is_all_day,
+            start_time=start_time,
+            end_time=end_time,
+            location=location,
+            description=description,
         )
 
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Creating Google Calendar event",
+                extra={"calendar_id": calendar_id, "event": event},
+            )
+
         try:
             return (
-                self.service.events()
+                service.events()
                 .insert(
-                    calendarId=settings.google_calendar_id,
+                    calendarId=calendar_id,
                     body=event,
                 )
                 .execute()
             )
         except Exception as exc:
-            error_msg = f"Failed to create calendar event: {exc}"
-            if hasattr(exc, "content"):
-                error_msg += f"\nError details: {getattr(exc, 'content')}"
-            raise RuntimeError(error_msg) from exc
+            raise RuntimeError(_create_error_message(exc)) from exc
+
+    def create_events(
+        self, events: Sequence[Mapping[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Create several events using batched inserts; each item takes create_event kwargs.
+
+        Raises CalendarBatchError, carrying the events that were created, if any
+        insert fails.
+        """
+        service, calendar_id = self._require_service()
+        bodies = [self._build_event_body(**item) for item in events]
+        created: List[Optional[Dict[str, Any]]] = [None] * len(bodies)
+        failed: Dict[int, Exception] = {}
+
+        def _collect(
+            request_id: str, response: Any, exception: Optional[Exception]
+        ) -> None:
+            if exception is not None:
+                failed[int(request_id)] = exception
+                return
+            created[int(request_id)] = response
+
+        for offset in range(0, len(bodies), _BATCH_MAX_REQUESTS):
+            chunk = bodies[offset : offset + _BATCH_MAX_REQUESTS]
+            batch = service.new_batch_http_request(callback=_collect)
+            for index, body in enumerate(chunk, start=offset):
+                batch.add(
+                    service.events().insert(calendarId=calendar_id, body=body),
+                    request_id=str(index),
+                )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Creating Google Calendar events in batch",
+                    extra={"calendar_id": calendar_id, "count": len(chunk)},
+                )
+            try:
+                batch.execute()
+            except _BATCH_REQUEST_ERRORS as exc:
+                # The whole batch request failed; do not start further batches, and
+                # report every event that was not confirmed as failed.
+                for index in range(offset, len(bodies)):
+                    if created[index] is None:
+                        failed.setdefault(index, exc)
+                break
+
+        inserted = [event for event in created if event is not None]
+        if failed:
+            raise CalendarBatchError(inserted, failed) from failed[min(failed)]
+        return inserted
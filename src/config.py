@@ -1,7 +1,8 @@
 """Runtime settings loader with dotenv reload and caching.
 
 Environment behavior:
-- Reads from .env if present (override=True) and refreshes on mtime change.
+- Reads from .env if present (override=True) and refreshes on mtime change,
+  checking the file at most once per second.
 - Caches settings for a short TTL to avoid reloading on every access.
 
 Tuning:
@@ -10,18 +11,24 @@ Tuning:
 - SETTINGS_REFRESH_INTERVAL is used by the app's periodic refresh job (seconds, default 1.0).
 """
 
+import functools
 import json
 import logging
 import os
+import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from threading import Lock
-from typing import List, Optional
+from types import MappingProxyType
+from typing import Any, FrozenSet, List, Mapping, Optional
 
 from dotenv import find_dotenv, load_dotenv
 
 _DOTENV_PATH = os.getenv("DOTENV_PATH") or find_dotenv(usecwd=True)
 _DOTENV_MTIME = None
+# Stat/parse .env at most this often (seconds), independent of the settings TTL.
+_DOTENV_CHECK_INTERVAL = 1.0
+_DOTENV_CHECKED_TS = None
 _ENV_LOCK = Lock()
 _SETTINGS_CACHE = None
 _SETTINGS_CACHE_TS = 0.0
@@ -29,7 +36,14 @@ _CACHE_TTL = 1.0
 
 
 def _reload_env() -> None:
-    global _DOTENV_MTIME
+    global _DOTENV_MTIME, _DOTENV_CHECKED_TS
+    now = time.monotonic()
+    if (
+        _DOTENV_CHECKED_TS is not None
+        and (now - _DOTENV_CHECKED_TS) < _DOTENV_CHECK_INTERVAL
+    ):
+        return
+    _DOTENV_CHECKED_TS = now
     if _DOTENV_PATH:
         try:
             mtime = os.path.getmtime(_DOTENV_PATH)
@@ -42,39 +56,46 @@ def _reload_env() -> None:
         load_dotenv(override=True)
 
 
-def _env_bool(name: str, default: str = "false") -> bool:
-    return os.getenv(name, default).lower() == "true"
+def _env_bool(env: Mapping[str, str], name: str, default: str = "false") -> bool:
+    return env.get(name, default).lower() == "true"
 
 
-def _csv_list(raw_value: str, *, lowercase: bool = False) -> List[str]:
-    items: List[str] = []
+@functools.lru_cache(maxsize=32)
+def _csv_set(raw_value: str, *, lowercase: bool = False) -> FrozenSet[str]:
+    # Settings are rebuilt every TTL but these values rarely change; the result is
+    # immutable so it can be shared between Settings instances.
+    items = set()
     for raw_item in raw_value.split(","):
         item = raw_item.strip()
         if not item:
             continue
-        items.append(item.lower() if lowercase else item)
-    return items
+        items.add(item.lower() if lowercase else item)
+    return frozenset(items)
 
 
-def _require_env(name: str) -> str:
-    value = os.getenv(name)
+def _require_env(env: Mapping[str, str], name: str) -> str:
+    value = env.get(name)
     if value is None:
         raise RuntimeError(f"Missing required environment variable: {name}")
     return value
 
 
-@dataclass(frozen=True)
+# Slots make the per-refresh Settings instances smaller; only available on 3.10+.
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class ModelSpec:
     name: str
     rpm: Optional[int]
     rpd: Optional[int]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class Settings:
     telegram_bot_token: str
     admin_chat_id: Optional[str]
-    features: dict
+    features: Mapping[str, Any]
     model_provider: str
     gemini_api_key: str
     google_api_key: str
@@ -98,8 +119,8 @@ class Settings:
     google_calendar_id: Optional[str]
     google_credentials_path: Optional[str]
     google_credentials_json: Optional[str]
-    allowed_chat_ids: List[str]
-    bot_aliases: List[str]
+    allowed_chat_ids: FrozenSet[str]
+    bot_aliases: FrozenSet[str]
     language: str
     token_limit: int
     chat_messages_store_path: str
@@ -123,6 +144,15 @@ class Settings:
     telegram_format_ai_replies: bool
     telegram_use_message_drafts: bool
     telegram_draft_update_interval_secs: float
+    telegram_max_concurrent_updates: int
+    transcript_cache_enabled: bool
+    transcript_cache_dir: str
+    transcript_cache_max_entries: int
+    transcript_cache_max_age_secs: float
+
+
+# Legacy ``config.UPPER_CASE`` access maps onto the matching Settings field.
+_LEGACY_SETTING_NAMES = {field.name.upper(): field.name for field in fields(Settings)}
 
 
 def get_settings(force: bool = False) -> Settings:
@@ -132,37 +162,39 @@ def get_settings(force: bool = False) -> Settings:
         return _SETTINGS_CACHE
     with _ENV_LOCK:
         _reload_env()
-        _CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "1.0"))
+        # One plain-dict snapshot: cheaper lookups than os.getenv and a consistent
+        # view even if the environment is reloaded concurrently.
+        env = dict(os.environ)
+        _CACHE_TTL = float(env.get("SETTINGS_CACHE_TTL", "1.0"))
 
-    telegram_bot_token = _require_env("TELEGRAM_BOT_TOKEN")
-    gemini_api_key = os.getenv("GEMINI_API_KEY", "").strip()
-    model_provider = os.getenv("MODEL_PROVIDER", "openai").strip().lower()
+    telegram_bot_token = _require_env(env, "TELEGRAM_BOT_TOKEN")
+    gemini_api_key = env.get("GEMINI_API_KEY", "").strip()
+    model_provider = env.get("MODEL_PROVIDER", "openai").strip().lower()
     if model_provider not in {"openai", "gemini"}:
         raise RuntimeError("MODEL_PROVIDER must be either 'openai' or 'gemini'")
     if model_provider == "gemini" and not gemini_api_key:
         raise RuntimeError("Missing required environment variable: GEMINI_API_KEY")
-    openai_api_key = os.getenv("OPENAI_API_KEY", "").strip()
-    openai_auth_json_path = os.getenv("OPENAI_AUTH_JSON_PATH", "").strip()
-    openai_refresh_url = os.getenv(
+    openai_api_key = env.get("OPENAI_API_KEY", "").strip()
+    openai_auth_json_path = env.get("OPENAI_AUTH_JSON_PATH", "").strip()
+    openai_refresh_url = env.get(
         "OPENAI_REFRESH_URL", "https://auth.openai.com/oauth/token"
     ).strip()
-    openai_refresh_client_id = os.getenv("OPENAI_REFRESH_CLIENT_ID", "").strip()
+    openai_refresh_client_id = env.get("OPENAI_REFRESH_CLIENT_ID", "").strip()
     openai_refresh_grant_type = (
-        os.getenv("OPENAI_REFRESH_GRANT_TYPE", "refresh_token").strip()
-        or "refresh_token"
+        env.get("OPENAI_REFRESH_GRANT_TYPE", "refresh_token").strip() or "refresh_token"
     )
-    openai_auth_leeway_secs = int(os.getenv("OPENAI_AUTH_LEEWAY_SECS", "60"))
-    openai_auth_timeout_secs = float(os.getenv("OPENAI_AUTH_TIMEOUT_SECS", "20"))
-    openai_codex_base_url = os.getenv(
+    openai_auth_leeway_secs = int(env.get("OPENAI_AUTH_LEEWAY_SECS", "60"))
+    openai_auth_timeout_secs = float(env.get("OPENAI_AUTH_TIMEOUT_SECS", "20"))
+    openai_codex_base_url = env.get(
         "OPENAI_CODEX_BASE_URL", "https://chatgpt.com/backend-api"
     ).strip()
     openai_codex_default_model = (
-        os.getenv("OPENAI_CODEX_DEFAULT_MODEL", "gpt-5.3-codex").strip()
+        env.get("OPENAI_CODEX_DEFAULT_MODEL", "gpt-5.3-codex").strip()
         or "gpt-5.3-codex"
     )
-    openai_model_env = os.getenv("OPENAI_MODEL")
-    openai_low_cost_model_env = os.getenv("OPENAI_LOW_COST_MODEL")
-    openai_reaction_model_env = os.getenv("OPENAI_REACTION_MODEL")
+    openai_model_env = env.get("OPENAI_MODEL")
+    openai_low_cost_model_env = env.get("OPENAI_LOW_COST_MODEL")
+    openai_reaction_model_env = env.get("OPENAI_REACTION_MODEL")
     openai_model = (openai_model_env or "gpt-5.3-codex").strip()
     openai_low_cost_model = (openai_low_cost_model_env or openai_model).strip()
     openai_reaction_model = (openai_reaction_model_env or openai_low_cost_model).strip()
@@ -179,28 +211,27 @@ def get_settings(force: bool = False) -> Settings:
             "OpenAI mode requires OPENAI_API_KEY or OPENAI_AUTH_JSON_PATH"
         )
 
-    google_api_key = os.getenv("GOOGLE_API_KEY") or gemini_api_key
-    if google_api_key:
-        os.environ["GOOGLE_API_KEY"] = google_api_key
+    google_api_key = env.get("GOOGLE_API_KEY") or gemini_api_key
 
-    allowed_chat_ids_raw = _require_env("ALLOWED_CHAT_IDS")
-    allowed_chat_ids = _csv_list(allowed_chat_ids_raw)
+    allowed_chat_ids_raw = _require_env(env, "ALLOWED_CHAT_IDS")
+    allowed_chat_ids = _csv_set(allowed_chat_ids_raw)
 
-    features = {
-        "commands": {
-            "hi": True,
-        },
-        "message_handling": _env_bool("ENABLE_MESSAGE_HANDLING"),
-        "schedule_events": _env_bool("ENABLE_SCHEDULE_EVENTS"),
-    }
+    # Read-only views: Settings is shared across handlers and must not be mutated.
+    features = MappingProxyType(
+        {
+            "commands": MappingProxyType({"hi": True}),
+            "message_handling": _env_bool(env, "ENABLE_MESSAGE_HANDLING"),
+            "schedule_events": _env_bool(env, "ENABLE_SCHEDULE_EVENTS"),
+        }
+    )
     if features["message_handling"] and features["schedule_events"]:
         raise RuntimeError(
             "ENABLE_MESSAGE_HANDLING and ENABLE_SCHEDULE_EVENTS are mutually exclusive; enable only one."
         )
 
-    gemini_model = os.getenv("GEMINI_MODEL", "gemini-2.0-flash").lower()
+    gemini_model = env.get("GEMINI_MODEL", "gemini-2.0-flash").lower()
 
-    gemini_models_raw = os.getenv("GEMINI_MODELS", "").strip()
+    gemini_models_raw = env.get("GEMINI_MODELS", "").strip()
     gemini_models: List[ModelSpec] = []
     if gemini_models_raw:
         try:
@@ -230,7 +261,7 @@ def get_settings(force: bool = False) -> Settings:
 
     settings = Settings(
         telegram_bot_token=telegram_bot_token,
-        admin_chat_id=os.getenv("ADMIN_CHAT_ID"),
+        admin_chat_id=env.get("ADMIN_CHAT_ID"),
         features=features,
         model_provider=model_provider,
         gemini_api_key=gemini_api_key,
@@ -249,52 +280,61 @@ def get_settings(force: bool = False) -> Settings:
         openai_model=openai_model,
         openai_low_cost_model=openai_low_cost_model,
         openai_reaction_model=openai_reaction_model,
-        thinking_budget=int(os.getenv("THINKING_BUDGET", 0)),
-        use_google_search=_env_bool("USE_GOOGLE_SEARCH"),
-        ai_system_instructions_path=os.getenv("SYSTEM_INSTRUCTIONS_PATH", ""),
-        google_calendar_id=os.getenv("GOOGLE_CALENDAR_ID"),
-        google_credentials_path=os.getenv("GOOGLE_CREDENTIALS_PATH"),
-        google_credentials_json=os.getenv("GOOGLE_CREDENTIALS_JSON"),
+        thinking_budget=int(env.get("THINKING_BUDGET", 0)),
+        use_google_search=_env_bool(env, "USE_GOOGLE_SEARCH"),
+        ai_system_instructions_path=env.get("SYSTEM_INSTRUCTIONS_PATH", ""),
+        google_calendar_id=env.get("GOOGLE_CALENDAR_ID"),
+        google_credentials_path=env.get("GOOGLE_CREDENTIALS_PATH"),
+        google_credentials_json=env.get("GOOGLE_CREDENTIALS_JSON"),
         allowed_chat_ids=allowed_chat_ids,
-        bot_aliases=_csv_list(os.getenv("BOT_ALIASES", ""), lowercase=True),
-        language=os.getenv("LANGUAGE", "ru").lower(),
-        token_limit=int(os.getenv("TOKEN_LIMIT", 500_000)),
-        chat_messages_store_path=os.getenv(
-            "CHAT_MESSAGES_STORE_PATH", "messages.jsonl"
-        ),
-        memory_enabled=_env_bool("MEMORY_ENABLED", "true"),
-        memory_recent_turns=max(1, int(os.getenv("MEMORY_RECENT_TURNS", "20"))),
+        bot_aliases=_csv_set(env.get("BOT_ALIASES", ""), lowercase=True),
+        language=env.get("LANGUAGE", "ru").lower(),
+        token_limit=int(env.get("TOKEN_LIMIT", 500_000)),
+        chat_messages_store_path=env.get("CHAT_MESSAGES_STORE_PATH", "messages.jsonl"),
+        memory_enabled=_env_bool(env, "MEMORY_ENABLED", "true"),
+        memory_recent_turns=max(1, int(env.get("MEMORY_RECENT_TURNS", "20"))),
         memory_recent_budget_ratio=min(
-            1.0, max(0.0, float(os.getenv("MEMORY_RECENT_BUDGET_RATIO", "0.85")))
+            1.0, max(0.0, float(env.get("MEMORY_RECENT_BUDGET_RATIO", "0.85")))
         ),
-        memory_summary_enabled=_env_bool("MEMORY_SUMMARY_ENABLED"),
+        memory_summary_enabled=_env_bool(env, "MEMORY_SUMMARY_ENABLED"),
         memory_summary_budget_ratio=min(
-            1.0, max(0.0, float(os.getenv("MEMORY_SUMMARY_BUDGET_RATIO", "0.15")))
+            1.0, max(0.0, float(env.get("MEMORY_SUMMARY_BUDGET_RATIO", "0.15")))
         ),
         memory_summary_chunk_size=max(
-            2, int(os.getenv("MEMORY_SUMMARY_CHUNK_SIZE", "16"))
-        ),
-        memory_summary_max_items=max(
-            0, int(os.getenv("MEMORY_SUMMARY_MAX_ITEMS", "4"))
+            2, int(env.get("MEMORY_SUMMARY_CHUNK_SIZE", "16"))
         ),
+        memory_summary_max_items=max(0, int(env.get("MEMORY_SUMMARY_MAX_ITEMS", "4"))),
         memory_summary_max_chunks_per_run=max(
-            1, int(os.getenv("MEMORY_SUMMARY_MAX_CHUNKS_PER_RUN", "1"))
+            1, int(env.get("MEMORY_SUMMARY_MAX_CHUNKS_PER_RUN", "1"))
         ),
-        debug_mode=_env_bool("DEBUG_MODE"),
-        settings_refresh_interval=float(os.getenv("SETTINGS_REFRESH_INTERVAL", "1.0")),
-        reaction_enabled=_env_bool("REACTION_ENABLED"),
-        reaction_cooldown_secs=float(os.getenv("REACTION_COOLDOWN_SECS", "600")),
-        reaction_daily_budget=int(os.getenv("REACTION_DAILY_BUDGET", "50")),
-        reaction_messages_threshold=int(os.getenv("REACTION_MESSAGES_THRESHOLD", "10")),
-        reaction_gemini_model=os.getenv("REACTION_GEMINI_MODEL", gemini_model).lower(),
-        reaction_context_turns=max(1, int(os.getenv("REACTION_CONTEXT_TURNS", "8"))),
+        debug_mode=_env_bool(env, "DEBUG_MODE"),
+        settings_refresh_interval=float(env.get("SETTINGS_REFRESH_INTERVAL", "1.0")),
+        reaction_enabled=_env_bool(env, "REACTION_ENABLED"),
+        reaction_cooldown_secs=float(env.get("REACTION_COOLDOWN_SECS", "600")),
+        reaction_daily_budget=int(env.get("REACTION_DAILY_BUDGET", "50")),
+        reaction_messages_threshold=int(env.get("REACTION_MESSAGES_THRESHOLD", "10")),
+        reaction_gemini_model=env.get("REACTION_GEMINI_MODEL", gemini_model).lower(),
+        reaction_context_turns=max(1, int(env.get("REACTION_CONTEXT_TURNS", "8"))),
         reaction_context_token_limit=max(
-            1, int(os.getenv("REACTION_CONTEXT_TOKEN_LIMIT", "1200"))
+            1, int(env.get("REACTION_CONTEXT_TOKEN_LIMIT", "1200"))
         ),
-        telegram_format_ai_replies=_env_bool("TELEGRAM_FORMAT_AI_REPLIES", "true"),
-        telegram_use_message_drafts=_env_bool("TELEGRAM_USE_MESSAGE_DRAFTS"),
+        telegram_format_ai_replies=_env_bool(env, "TELEGRAM_FORMAT_AI_REPLIES", "true"),
+        telegram_use_message_drafts=_env_bool(env, "TELEGRAM_USE_MESSAGE_DRAFTS"),
         telegram_draft_update_interval_secs=max(
-            0.05, float(os.getenv("TELEGRAM_DRAFT_UPDATE_INTERVAL_SECS", "0.15"))
+            0.05, float(env.get("TELEGRAM_DRAFT_UPDATE_INTERVAL_SECS", "0.15"))
+        ),
+        telegram_max_concurrent_updates=max(
+            1, int(env.get("TELEGRAM_MAX_CONCURRENT_UPDATES", "16"))
+        ),
+        transcript_cache_enabled=_env_bool(env, "TRANSCRIPT_CACHE_ENABLED", "true"),
+        transcript_cache_dir=os.path.expanduser(
+            env.get("TRANSCRIPT_CACHE_DIR", "~/.cache/kabanus/transcripts")
+        ),
+        transcript_cache_max_entries=max(
+            1, int(env.get("TRANSCRIPT_CACHE_MAX_ENTRIES", "1000"))
+        ),
+        transcript_cache_max_age_secs=max(
+            1.0, float(env.get("TRANSCRIPT_CACHE_MAX_AGE_HOURS", "168")) * 3600
         ),
     )
     _SETTINGS_CACHE = settings
@@ -303,60 +343,7 @@ def get_settings(force: bool = False) -> Settings:
 
 
 def __getattr__(name: str):
-    settings = get_settings()
-    mapping = {
-        "TELEGRAM_BOT_TOKEN": settings.telegram_bot_token,
-        "ADMIN_CHAT_ID": settings.admin_chat_id,
-        "FEATURES": settings.features,
-        "MODEL_PROVIDER": settings.model_provider,
-        "GEMINI_API_KEY": settings.gemini_api_key,
-        "GOOGLE_API_KEY": settings.google_api_key,
-        "GEMINI_MODEL": settings.gemini_model,
-        "GEMINI_MODELS": settings.gemini_models,
-        "OPENAI_API_KEY": settings.openai_api_key,
-        "OPENAI_AUTH_JSON_PATH": settings.openai_auth_json_path,
-        "OPENAI_REFRESH_URL": settings.openai_refresh_url,
-        "OPENAI_REFRESH_CLIENT_ID": settings.openai_refresh_client_id,
-        "OPENAI_REFRESH_GRANT_TYPE": settings.openai_refresh_grant_type,
-        "OPENAI_AUTH_LEEWAY_SECS": settings.openai_auth_leeway_secs,
-        "OPENAI_AUTH_TIMEOUT_SECS": settings.openai_auth_timeout_secs,
-        "OPENAI_CODEX_BASE_URL": settings.openai_codex_base_url,
-        "OPENAI_CODEX_DEFAULT_MODEL": settings.openai_codex_default_model,
-        "OPENAI_MODEL": settings.openai_model,
-        "OPENAI_LOW_COST_MODEL": settings.openai_low_cost_model,
-        "OPENAI_REACTION_MODEL": settings.openai_reaction_model,
-        "THINKING_BUDGET": settings.thinking_budget,
-        "USE_GOOGLE_SEARCH": settings.use_google_search,
-        "AI_SYSTEM_INSTRUCTIONS_PATH": settings.ai_system_instructions_path,
-        "GOOGLE_CALENDAR_ID": settings.google_calendar_id,
-        "GOOGLE_CREDENTIALS_PATH": settings.google_credentials_path,
-        "GOOGLE_CREDENTIALS_JSON": settings.google_credentials_json,
-        "ALLOWED_CHAT_IDS": settings.allowed_chat_ids,
-        "BOT_ALIASES": settings.bot_aliases,
-        "LANGUAGE": settings.language,
-        "TOKEN_LIMIT": settings.token_limit,
-        "CHAT_MESSAGES_STORE_PATH": settings.chat_messages_store_path,
-        "MEMORY_ENABLED": settings.memory_enabled,
-        "MEMORY_RECENT_TURNS": settings.memory_recent_turns,
-        "MEMORY_RECENT_BUDGET_RATIO": settings.memory_recent_budget_ratio,
-        "MEMORY_SUMMARY_ENABLED": settings.memory_summary_enabled,
-        "MEMORY_SUMMARY_BUDGET_RATIO": settings.memory_summary_budget_ratio,
-        "MEMORY_SUMMARY_CHUNK_SIZE": settings.memory_summary_chunk_size,
-        "MEMORY_SUMMARY_MAX_ITEMS": settings.memory_summary_max_items,
-        "MEMORY_SUMMARY_MAX_CHUNKS_PER_RUN": settings.memory_summary_max_chunks_per_run,
-        "DEBUG_MODE": settings.debug_mode,
-        "SETTINGS_REFRESH_INTERVAL": settings.settings_refresh_interval,
-        "REACTION_ENABLED": settings.reaction_enabled,
-        "REACTION_COOLDOWN_SECS": settings.reaction_cooldown_secs,
-        "REACTION_DAILY_BUDGET": settings.reaction_daily_budget,
-        "REACTION_MESSAGES_THRESHOLD": settings.reaction_messages_threshold,
-        "REACTION_GEMINI_MODEL": settings.reaction_gemini_model,
-        "REACTION_CONTEXT_TURNS": settings.reaction_context_turns,
-        "REACTION_CONTEXT_TOKEN_LIMIT": settings.reaction_context_token_limit,
-        "TELEGRAM_FORMAT_AI_REPLIES": settings.telegram_format_ai_replies,
-        "TELEGRAM_USE_MESSAGE_DRAFTS": settings.telegram_use_message_drafts,
-        "TELEGRAM_DRAFT_UPDATE_INTERVAL_SECS": settings.telegram_draft_update_interval_secs,
-    }
-    if name in mapping:
-        return mapping[name]
-    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    attr = _LEGACY_SETTING_NAMES.get(name)
+    if attr is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(get_settings(), attr)
@@ -1,12 +1,15 @@
 # gemini_provider.py
-import json
 import logging
 import os
+import random
+import threading
 import time
-from datetime import datetime
+from datetime import date, datetime, time as dt_time, timedelta
 import re
 import functools
-from typing import Dict, List, Optional
+import itertools
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from google import genai
 from google.genai import types, errors
@@ -17,20 +20,167 @@ from .model_provider import ModelProvider
 
 logger = logging.getLogger(__name__)
 
+_MODULE_DIR = os.path.dirname(__file__)
+_MODEL_NAMES_TTL_SECS = 300.0
+_SYSTEM_INSTRUCTIONS_RECHECK_SECS = 5.0
+_REACTION_SYSTEM_INSTRUCTION = (
+    "You are a Telegram reactions selector. "
+    "Pick a single reaction emoji that fits the user message. "
+    "Return only the emoji, nothing else."
+)
+
+_IMAGE_EVENT_PROMPT_TEMPLATE = (
+    "Analyze this image and extract event information. "
+    "Provide a JSON response with the following fields: "
+    "title (string), date (YYYY-MM-DD), time (HH:MM), "
+    "location (string), description (string), "
+    "confidence (float between 0 and 1). "
+    "If any field is unclear, set it to null. "
+    "If there is no year, set it to current year (%d)"
+)
+
+# Immutable request configuration shared by every provider instance.
+_GROUNDING_TOOLS: List[types.ToolUnion] = [
+    types.Tool(google_search=types.GoogleSearch())
+]
+
+_SUPPORTS_SYSTEM_INSTRUCTION = 1
+_SUPPORTS_TOOLS = 2
+_SUPPORTS_THINKING = 4
+_SUPPORTS_AUDIO = 8
+
+
+@functools.lru_cache(maxsize=64)
+def _model_capabilities(model_name: str) -> int:
+    # Gemma models reject system instructions, tools, thinking config and audio input.
+    if "gemma" in model_name.lower():
+        return 0
+    return (
+        _SUPPORTS_SYSTEM_INSTRUCTION
+        | _SUPPORTS_TOOLS
+        | _SUPPORTS_THINKING
+        | _SUPPORTS_AUDIO
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _generate_config(
+    system_instruction: Optional[str],
+    thinking_budget: int,
+    use_google_search: bool,
+) -> types.GenerateContentConfig:
+    # Only a handful of combinations occur in practice; building and validating
+    # these pydantic models per request is wasted work. A bounded cache keeps old
+    # system-instruction versions from accumulating after edits.
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        thinking_config=(
+            types.ThinkingConfig(thinking_budget=thinking_budget)
+            if thinking_budget > 0
+            else None
+        ),
+        tools=_GROUNDING_TOOLS if use_google_search else None,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _join_reactions(allowed_reactions: Tuple[str, ...]) -> str:
+    # The allowed set is effectively constant per process.
+    return ", ".join(allowed_reactions)
+
+# genai clients own HTTP connection pools; share one per API key across providers.
+_CLIENTS: Dict[str, genai.Client] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _shared_client(api_key: str) -> genai.Client:
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(api_key)
+        if client is None:
+            client = genai.Client(api_key=api_key)
+            _CLIENTS[api_key] = client
+        return client
+
+
+def _response_text(response) -> str:
+    # response.text is a computed property that joins the candidate parts; read it
+    # once and only strip when there is surrounding whitespace.
+    text = response.text
+    if not text:
+        return ""
+    if text[:1].isspace() or text[-1:].isspace():
+        return text.strip()
+    return text
+
+
+def _error_details(exc: errors.APIError) -> List[Any]:
+    details = exc.details
+    error = details.get("error", details) if isinstance(details, dict) else None
+    if not isinstance(error, dict):
+        return []
+    return [item for item in error.get("details") or [] if isinstance(item, dict)]
+
+
+def _is_daily_quota(exc: errors.APIError) -> bool:
+    """True when a google.rpc.QuotaFailure names a per-day quota."""
+    for item in _error_details(exc):
+        if not str(item.get("@type", "")).endswith("google.rpc.QuotaFailure"):
+            continue
+        for violation in item.get("violations") or []:
+            if not isinstance(violation, dict):
+                continue
+            quota = f"{violation.get('quotaId', '')} {violation.get('quotaMetric', '')}"
+            if "perday" in quota.lower():
+                return True
+    return False
+
+
+def _close_stream(stream: Any) -> None:
+    close = getattr(stream, "close", None)
+    if callable(close):
+        close()
+
+
+def _retry_delay_secs(exc: errors.APIError) -> Optional[float]:
+    """Extract the server's retry hint (google.rpc.RetryInfo or Retry-After), if any."""
+    for item in _error_details(exc):
+        if "retryDelay" not in item:
+            continue
+        try:
+            return max(0.0, float(str(item["retryDelay"]).rstrip("s")))
+        except ValueError:
+            break
+    headers = getattr(exc.response, "headers", None)
+    retry_after = headers.get("retry-after") if headers is not None else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return None
+    return None
+
 
 class _ModelUsage:
     def __init__(self) -> None:
-        self.minute_window_start = 0.0
-        self.minute_count = 0
+        # Token bucket for RPM: refills continuously, so there is no burst at a
+        # fixed window boundary.
+        self.tokens: Optional[float] = None
+        self.last_refill = 0.0
         self.day = None
         self.day_count = 0
         self.cooldown_until = 0.0
         self.exhausted_until_day = None
 
-    def _reset_minute_if_needed(self, now: float) -> None:
-        if now - self.minute_window_start >= 60:
-            self.minute_window_start = now
-            self.minute_count = 0
+    def _refill(self, spec: config.ModelSpec, now: float) -> None:
+        if spec.rpm is None:
+            return
+        capacity = float(spec.rpm)
+        if self.tokens is None:
+            self.tokens = capacity
+        else:
+            elapsed = max(0.0, now - self.last_refill)
+            self.tokens = min(capacity, self.tokens + elapsed * capacity / 60.0)
+        self.last_refill = now
 
     def _reset_day_if_needed(self, today) -> None:
         if self.day != today:
@@ -39,22 +189,23 @@ class _ModelUsage:
             self.exhausted_until_day = None
 
     def can_use(self, spec: config.ModelSpec, now: float, today) -> bool:
-        self._reset_minute_if_needed(now)
+        self._refill(spec, now)
         self._reset_day_if_needed(today)
         if self.cooldown_until and now < self.cooldown_until:
             return False
         if self.exhausted_until_day == today:
             return False
-        if spec.rpm is not None and self.minute_count >= spec.rpm:
+        if self.tokens is not None and self.tokens < 1:
             return False
         if spec.rpd is not None and self.day_count >= spec.rpd:
             return False
         return True
 
-    def record_request(self, now: float, today) -> None:
-        self._reset_minute_if_needed(now)
+    def record_request(self, spec: config.ModelSpec, now: float, today) -> None:
+        self._refill(spec, now)
         self._reset_day_if_needed(today)
-        self.minute_count += 1
+        if self.tokens is not None:
+            self.tokens -= 1
         self.day_count += 1
 
     def mark_exhausted(self, today) -> None:
@@ -63,45 +214,86 @@ class _ModelUsage:
 
 class _ModelRouter:
     def __init__(self) -> None:
-        self._usage_by_model: Dict[str, _ModelUsage] = {}
-
-    def pick_model(self, specs: List[config.ModelSpec]) -> Optional[config.ModelSpec]:
-        now = time.monotonic()
-        today = datetime.now().date()
-        for spec in specs:
-            usage = self._usage_by_model.setdefault(spec.name, _ModelUsage())
-            if usage.can_use(spec, now, today):
-                return spec
+        self._usage_by_model: Dict[str, _ModelUsage] = defaultdict(_ModelUsage)
+        # Provider calls run on a thread pool; admission and accounting must not
+        # interleave or concurrent picks can overshoot RPM/RPD.
+        self._lock = threading.Lock()
+        # (monotonic deadline, local date) for _today().
+        self._today_cache: Tuple[float, Optional[date]] = (0.0, None)
+
+    def _today(self, now: float) -> date:
+        """Local date, recomputed at most once a minute and exactly at midnight."""
+        valid_until, today = self._today_cache
+        if today is not None and now < valid_until:
+            return today
+        wall_now = datetime.now()
+        today = wall_now.date()
+        next_midnight = datetime.combine(today + timedelta(days=1), dt_time.min)
+        ttl = min(60.0, (next_midnight - wall_now).total_seconds())
+        self._today_cache = (now + ttl, today)
+        return today
+
+    def pick_model(
+        self, specs: List[config.ModelSpec], *, record: bool = False
+    ) -> Optional[config.ModelSpec]:
+        # With record=True the pick is counted against the model's limits using
+        # the same clock reading as the admission check.
+        with self._lock:
+            now = time.monotonic()
+            today = self._today(now)
+            for spec in specs:
+                usage = self._usage_by_model[spec.name]
+                if usage.can_use(spec, now, today):
+                    if record:
+                        usage.record_request(spec, now, today)
+                    return spec
         logger.error("All configured models exhausted for RPM/RPD limits.", extra={"event": "model_exhausted"})
         return None
 
-    def record_request(self, spec: config.ModelSpec) -> None:
-        usage = self._usage_by_model.setdefault(spec.name, _ModelUsage())
-        usage.record_request(time.monotonic(), datetime.now().date())
+    def pick_and_record(
+        self, specs: List[config.ModelSpec]
+    ) -> Optional[config.ModelSpec]:
+        return self.pick_model(specs, record=True)
 
     def mark_exhausted(self, spec: config.ModelSpec) -> None:
-        usage = self._usage_by_model.setdefault(spec.name, _ModelUsage())
-        usage.mark_exhausted(datetime.now().date())
+        with self._lock:
+            usage = self._usage_by_model[spec.name]
+            usage.mark_exhausted(self._today(time.monotonic()))
+
+    def cool_down(self, spec: config.ModelSpec, delay_secs: float) -> None:
+        with self._lock:
+            usage = self._usage_by_model[spec.name]
+            usage.cooldown_until = max(
+                usage.cooldown_until, time.monotonic() + delay_secs
+            )
 
 
 class GeminiProvider(ModelProvider):
 
     def __init__(self):
         self._client = None
-        self._client_api_key = None
+        self._client_settings = None
         self._system_instructions = ""
-        self._system_instructions_path = None
-        self._system_instructions_mtime = None
+        # (configured path, (mtime_ns, size)) of the file behind _system_instructions.
+        self._system_instructions_source: Optional[
+            Tuple[str, Optional[Tuple[int, int]]]
+        ] = None
+        self._system_instructions_checked_ts = 0.0
         self._model_router = _ModelRouter()
+        # (fetched at, names) for _available_model_names().
+        self._model_names: Tuple[float, Optional[Tuple[str, ...]]] = (0.0, None)
 
     def _supports_system_instruction(self, model_name: str) -> bool:
-        return "gemma" not in model_name.lower()
+        return bool(_model_capabilities(model_name) & _SUPPORTS_SYSTEM_INSTRUCTION)
 
     def _supports_tools(self, model_name: str) -> bool:
-        return "gemma" not in model_name.lower()
+        return bool(_model_capabilities(model_name) & _SUPPORTS_TOOLS)
 
     def _supports_thinking_config(self, model_name: str) -> bool:
-        return "gemma" not in model_name.lower()
+        return bool(_model_capabilities(model_name) & _SUPPORTS_THINKING)
+
+    def _supports_audio(self, model_name: str) -> bool:
+        return bool(_model_capabilities(model_name) & _SUPPORTS_AUDIO)
 
     def _prefer_gemma_first(self, specs: List[config.ModelSpec]) -> List[config.ModelSpec]:
         return sorted(specs, key=lambda spec: "gemma" not in spec.name.lower())
@@ -156,7 +348,7 @@ class GeminiProvider(ModelProvider):
         self,
         spec: config.ModelSpec,
         contents,
-        system_instruction: str,
+        system_instruction: Optional[str],
     ):
         if not system_instruction:
             return contents, None
@@ -165,10 +357,12 @@ class GeminiProvider(ModelProvider):
         if isinstance(contents, str):
             return f"{system_instruction}\n\n{contents}", None
         if isinstance(contents, list) and contents:
+            # Copy rather than mutate: the caller's list is shared across retries.
             if isinstance(contents[0], str):
-                contents = [f"{system_instruction}\n\n{contents[0]}"] + contents[1:]
+                contents = contents.copy()
+                contents[0] = f"{system_instruction}\n\n{contents[0]}"
             else:
-                contents = [system_instruction] + contents
+                contents = [system_instruction, *contents]
         return contents, None
 
     def _prepare_config(
@@ -177,22 +371,49 @@ class GeminiProvider(ModelProvider):
         *,
         system_instruction: Optional[str],
         thinking_budget: int,
-        tools=None,
+        use_google_search: bool = False,
     ) -> types.GenerateContentConfig:
         if not self._supports_thinking_config(spec.name):
             thinking_budget = 0
         if not self._supports_tools(spec.name):
-            tools = None
-        if thinking_budget > 0:
-            thinking_config = types.ThinkingConfig(thinking_budget=thinking_budget)
-        else:
-            thinking_config = None
-        return types.GenerateContentConfig(
-            system_instruction=system_instruction,
-            thinking_config=thinking_config,
-            tools=tools,
+            use_google_search = False
+        return _generate_config(
+            system_instruction, max(thinking_budget, 0), use_google_search
         )
 
+    def _request_builder(
+        self,
+        contents,
+        system_instruction: Optional[str],
+        *,
+        thinking_budget: int,
+        use_google_search: bool = False,
+    ) -> Callable[[config.ModelSpec], Tuple[Any, types.GenerateContentConfig]]:
+        # The payload only depends on the model's capabilities, so retries and
+        # fallbacks to a model with the same capabilities reuse it.
+        prepared: Dict[int, Tuple[Any, types.GenerateContentConfig]] = {}
+
+        def build(spec: config.ModelSpec) -> Tuple[Any, types.GenerateContentConfig]:
+            key = _model_capabilities(spec.name)
+            request = prepared.get(key)
+            if request is None:
+                request_contents, instruction = self._prepare_contents(
+                    spec,
+                    contents,
+                    system_instruction,
+                )
+                request = prepared[key] = (
+                    request_contents,
+                    self._prepare_config(
+                        spec,
+                        system_instruction=instruction,
+                        thinking_budget=thinking_budget,
+                        use_google_search=use_google_search,
+                    ),
+                )
+            return request
+
+        return build
 
     def _on_generate_error(
         self,
@@ -209,7 +430,9 @@ class GeminiProvider(ModelProvider):
         if not isinstance(exc, errors.ClientError):
             return False
         if exc.status == "NOT_FOUND":
-            all_models = " ,".join(f"'{m}'" for m in client.models.list())
+            all_models = ", ".join(
+                f"'{name}'" for name in self._available_model_names(client)
+            )
             logger.error(
                 "Gemini model not found",
                 extra={"model": spec.name, "available_models": all_models},
@@ -217,143 +440,263 @@ class GeminiProvider(ModelProvider):
             raise exc
         if exc.status != "RESOURCE_EXHAUSTED":
             return False
+        retry_delay = _retry_delay_secs(exc)
+        daily_quota = _is_daily_quota(exc)
         logger.error(
             "Gemini model quota exhausted. Retry with next model.",
-            extra={"model": spec.name, "attempt": attempt, "max_attempts": max_attempts},
+            extra={
+                "model": spec.name,
+                "attempt": attempt,
+                "max_attempts": max_attempts,
+                "retry_delay_secs": retry_delay,
+                "daily_quota": daily_quota,
+            },
         )
-        logger.debug("ClientError details", extra={"model": spec.name, "error": exc})
-        self._model_router.mark_exhausted(spec)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "ClientError details", extra={"model": spec.name, "error": exc}
+            )
+        if retry_delay is not None and not daily_quota:
+            # Short-term throttling: rest the model for the hinted delay (jittered so
+            # concurrent callers do not return together) instead of for the whole day.
+            # Per-day quota errors also carry a retryDelay, but retrying them before
+            # the day rolls over only adds failed requests.
+            self._model_router.cool_down(
+                spec, retry_delay * (1 + random.random() * 0.2)
+            )
+        else:
+            self._model_router.mark_exhausted(spec)
         if attempt < max_attempts:
             return True
         return False
 
+    def _available_model_names(self, client: genai.Client) -> Tuple[str, ...]:
+        # Listing models is a remote paginated call; keep a short-lived snapshot.
+        now = time.monotonic()
+        fetched_at, names = self._model_names
+        if names is None or now - fetched_at >= _MODEL_NAMES_TTL_SECS:
+            names = tuple(
+                model.name for model in client.models.list() if model.name is not None
+            )
+            self._model_names = (now, names)
+        return names
+
     def _get_client(self):
         settings = config.get_settings()
-        api_key = settings.google_api_key
-        if self._client is None or api_key != self._client_api_key:
-            os.environ["GOOGLE_API_KEY"] = api_key
-            self._client = genai.Client()
-            self._client_api_key = api_key
+        # get_settings() returns the same object until its cache expires, so the
+        # api key only needs re-checking when the snapshot changes.
+        if self._client is not None and settings is self._client_settings:
+            return self._client, settings
+        self._client = _shared_client(settings.google_api_key)
+        self._client_settings = settings
         return self._client, settings
 
+    def warm_up(self) -> None:
+        self._get_client()
+
     def _get_system_instructions(self, settings):
-        if settings.ai_system_instructions_path == "":
+        configured_path = settings.ai_system_instructions_path
+        if configured_path == "":
             logger.warning("AI system instructions path is not set.", extra={"event": "missing_system_instructions"})
             return ""
-        path = os.path.join(os.path.dirname(__file__), settings.ai_system_instructions_path)
+        # The prompt file is effectively static; only watch it for edits in debug mode,
+        # and even then stat it at most every few seconds.
+        cached_source = self._system_instructions_source
+        if cached_source is not None and configured_path == cached_source[0]:
+            if not settings.debug_mode:
+                return self._system_instructions
+            now = time.monotonic()
+            if (
+                now - self._system_instructions_checked_ts
+                < _SYSTEM_INSTRUCTIONS_RECHECK_SECS
+            ):
+                return self._system_instructions
+        path = os.path.join(_MODULE_DIR, configured_path)
         try:
-            mtime = os.path.getmtime(path)
+            st = os.stat(path)
+            signature = (st.st_mtime_ns, st.st_size)
         except OSError:
-            mtime = None
-        if path != self._system_instructions_path or mtime != self._system_instructions_mtime:
+            signature = None
+        source = (configured_path, signature)
+        if source != cached_source:
             with open(path, "r", encoding="utf-8") as f:
                 self._system_instructions = f.read()
-            self._system_instructions_path = path
-            self._system_instructions_mtime = mtime
+            self._system_instructions_source = source
+        self._system_instructions_checked_ts = time.monotonic()
         return self._system_instructions
 
-    def transcribe(self, audio_path: str) -> str:
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
+        if not audio_bytes:
+            return ""
         client, settings = self._get_client()
-        with open(audio_path, "rb") as f:
-            audio_bytes = f.read()
+        # Speech-to-text does not benefit from the most capable model; start with the cheapest one.
+        transcribe_specs = [
+            spec
+            for spec in self._prefer_low_cost_first(settings.gemini_models)
+            if self._supports_audio(spec.name)
+        ]
+        if not transcribe_specs:
+            logger.warning(
+                "No configured Gemini model accepts audio input",
+                extra={"models": [spec.name for spec in settings.gemini_models]},
+            )
+            return ""
+        request_contents = [
+            f"Transcribe this audio to {settings.language} text.",
+            types.Part.from_bytes(
+                data=audio_bytes,
+                mime_type=mime_type,
+            ),
+        ]
+
+        # Verbatim transcription gains nothing from reasoning tokens.
+        build_request = self._request_builder(request_contents, None, thinking_budget=0)
 
         def run_request(spec: config.ModelSpec):
-            self._model_router.record_request(spec)
+            contents, request_config = build_request(spec)
             return client.models.generate_content(
                 model=spec.name,
-                contents=[
-                    f"Transcribe this audio to {settings.language} text.",
-                    types.Part.from_bytes(
-                        data=audio_bytes,
-                        mime_type="audio/ogg",
-                    ),
-                ],
-                config=self._prepare_config(
-                    spec,
-                    system_instruction=None,
-                    thinking_budget=settings.thinking_budget,
-                ),
+                contents=contents,
+                config=request_config,
             )
 
         response = retry_utils.retry_with_item(
             max_attempts=5,
-            pick_item=lambda: self._model_router.pick_model(settings.gemini_models),
+            pick_item=lambda: self._model_router.pick_and_record(transcribe_specs),
             run=run_request,
             on_error=functools.partial(self._on_generate_error, client),
         )
         if response is None:
             return ""
 
-        return response.text.strip() if response.text else ""
+        return _response_text(response)
 
     def _generate_with_specs(
         self,
+        client: genai.Client,
+        settings: config.Settings,
         prompt: str,
         specs: List[config.ModelSpec],
-        *,
-        use_google_search: bool,
-        thinking_budget: int,
     ) -> str:
-        client, settings = self._get_client()
         system_instructions = self._get_system_instructions(settings)
-        grounding_tool = types.Tool(
-            google_search=types.GoogleSearch()
-        )
         selected_model = ""
+        build_request = self._request_builder(
+            prompt,
+            system_instructions,
+            thinking_budget=settings.thinking_budget,
+            use_google_search=settings.use_google_search,
+        )
 
         def run_request(spec: config.ModelSpec):
             nonlocal selected_model
             selected_model = spec.name
-            logger.debug("Generating content with model", extra={"model": spec.name})
-            self._model_router.record_request(spec)
-            contents, system_instruction = self._prepare_contents(
-                spec,
-                prompt,
-                system_instructions,
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Generating content with model", extra={"model": spec.name}
+                )
+            contents, request_config = build_request(spec)
             return client.models.generate_content(
                 model=spec.name,
                 contents=contents,
-                config=self._prepare_config(
-                    spec,
-                    system_instruction=system_instruction,
-                    thinking_budget=thinking_budget,
-                    tools=[grounding_tool] if use_google_search else None,
-                ),
+                config=request_config,
             )
 
         response = retry_utils.retry_with_item(
             max_attempts=5,
-            pick_item=lambda: self._model_router.pick_model(specs),
+            pick_item=lambda: self._model_router.pick_and_record(specs),
             run=run_request,
             on_error=functools.partial(self._on_generate_error, client),
         )
         if response is None:
             return ""
 
-        text = (response.text or "").strip() if response.text else ""
+        text = _response_text(response)
         if not text:
             self._log_empty_generation_response(selected_model, response)
         return text
 
     def generate(self, prompt: str) -> str:
-        _, settings = self._get_client()
+        client, settings = self._get_client()
         return self._generate_with_specs(
+            client,
+            settings,
             prompt=prompt,
             specs=settings.gemini_models,
-            use_google_search=settings.use_google_search,
+        )
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """Yield the growing response text as Gemini streams it back."""
+        client, settings = self._get_client()
+        build_request = self._request_builder(
+            prompt,
+            self._get_system_instructions(settings),
             thinking_budget=settings.thinking_budget,
+            use_google_search=settings.use_google_search,
+        )
+        selected_model = ""
+
+        def run_request(spec: config.ModelSpec):
+            nonlocal selected_model
+            selected_model = spec.name
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Streaming content with model", extra={"model": spec.name})
+            contents, request_config = build_request(spec)
+            stream = iter(
+                client.models.generate_content_stream(
+                    model=spec.name,
+                    contents=contents,
+                    config=request_config,
+                )
+            )
+            # Quota and model errors surface on the first read; pull it here so they
+            # go through the usual retry-with-next-model path.
+            try:
+                return next(stream, None), stream
+            except BaseException:
+                _close_stream(stream)
+                raise
+
+        result = retry_utils.retry_with_item(
+            max_attempts=5,
+            pick_item=lambda: self._model_router.pick_and_record(
+                settings.gemini_models
+            ),
+            run=run_request,
+            on_error=functools.partial(self._on_generate_error, client),
         )
+        if result is None:
+            return
+        first_chunk, stream = result
+        if first_chunk is None:
+            _close_stream(stream)
+            self._log_empty_generation_response(selected_model, None)
+            return
+        accumulated = ""
+        last_chunk = first_chunk
+        try:
+            for chunk in itertools.chain((first_chunk,), stream):
+                last_chunk = chunk
+                delta = chunk.text
+                if not delta:
+                    continue
+                accumulated += delta
+                yield accumulated
+        finally:
+            # Release the HTTP response when the consumer stops early.
+            _close_stream(stream)
+        if not accumulated.strip():
+            # Finish reason and safety ratings arrive on the final chunk.
+            self._log_empty_generation_response(selected_model, last_chunk)
 
     def generate_low_cost(self, prompt: str) -> str:
         """Generate using the lowest-cost model first (reverse GEMINI_MODELS order)."""
-        _, settings = self._get_client()
+        client, settings = self._get_client()
         low_cost_specs = self._prefer_low_cost_first(settings.gemini_models)
         return self._generate_with_specs(
+            client,
+            settings,
             prompt=prompt,
             specs=low_cost_specs,
-            use_google_search=settings.use_google_search,
-            thinking_budget=settings.thinking_budget,
         )
 
     def choose_reaction(
@@ -363,88 +706,77 @@ class GeminiProvider(ModelProvider):
         context_text: str = "",
     ) -> str:
         client, settings = self._get_client()
-        system_instruction = (
-            "You are a Telegram reactions selector. "
-            "Pick a single reaction emoji that fits the user message. "
-            "Return only the emoji, nothing else."
-        )
+        system_instruction = _REACTION_SYSTEM_INSTRUCTION
         prompt_parts = [f"Current message: {message}"]
         if context_text:
             prompt_parts.append(f"Recent context:\n{context_text}")
-        prompt_parts.append(f"Allowed reactions: {', '.join(allowed_reactions)}")
+        prompt_parts.append(
+            f"Allowed reactions: {_join_reactions(tuple(allowed_reactions))}"
+        )
         prompt = "\n\n".join(prompt_parts)
         reaction_specs = self._prefer_gemma_first(settings.gemini_models)
+        build_request = self._request_builder(
+            prompt, system_instruction, thinking_budget=0
+        )
 
         def run_request(spec: config.ModelSpec):
-            logger.debug("Choosing reaction with model", extra={"model": spec.name})
-            self._model_router.record_request(spec)
-            contents, instruction = self._prepare_contents(
-                spec,
-                prompt,
-                system_instruction,
-            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Choosing reaction with model", extra={"model": spec.name})
+            contents, request_config = build_request(spec)
             return client.models.generate_content(
                 model=spec.name,
                 contents=contents,
-                config=self._prepare_config(
-                    spec,
-                    system_instruction=instruction,
-                    thinking_budget=0,
-                ),
+                config=request_config,
             )
 
         response = retry_utils.retry_with_item(
             max_attempts=3,
-            pick_item=lambda: self._model_router.pick_model(reaction_specs),
+            pick_item=lambda: self._model_router.pick_and_record(reaction_specs),
             run=run_request,
             on_error=functools.partial(self._on_generate_error, client),
         )
         if response is None:
             return ""
 
-        return response.text.strip() if response.text else ""
+        return _response_text(response)
 
-    def parse_image_to_event(self, image_path: str) -> dict:
+    def parse_image_to_event(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> dict:
+        if not image_bytes:
+            return {}
         client, settings = self._get_client()
         system_instructions = self._get_system_instructions(settings)
-        with open(image_path, "rb") as f:
-            image_data = f.read()
+        # Build the request parts once; retries with another model reuse them.
+        request_contents = [
+            _IMAGE_EVENT_PROMPT_TEMPLATE % datetime.now().year,
+            types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+        ]
+        build_request = self._request_builder(
+            request_contents,
+            system_instructions,
+            thinking_budget=settings.thinking_budget,
+        )
 
         def run_request(spec: config.ModelSpec):
-            self._model_router.record_request(spec)
-            contents, system_instruction = self._prepare_contents(
-                spec,
-                [
-                    "Analyze this image and extract event information. " +
-                    "Provide a JSON response with the following fields: " +
-                    "title (string), date (YYYY-MM-DD), time (HH:MM), " +
-                    "location (string), description (string), " +
-                    "confidence (float between 0 and 1). " +
-                    "If any field is unclear, set it to null." +
-                    f"If there is no year, set it to current year ({datetime.now().year})",
-                    {"mime_type": "image/jpeg", "data": image_data}
-                ],
-                system_instructions,
-            )
+            contents, request_config = build_request(spec)
             return client.models.generate_content(
                 model=spec.name,
                 contents=contents,
-                config=self._prepare_config(
-                    spec,
-                    system_instruction=system_instruction,
-                    thinking_budget=settings.thinking_budget,
-                ),
+                config=request_config,
             )
 
         response = retry_utils.retry_with_item(
             max_attempts=5,
-            pick_item=lambda: self._model_router.pick_model(settings.gemini_models),
+            pick_item=lambda: self._model_router.pick_and_record(
+                settings.gemini_models
+            ),
             run=run_request,
             on_error=functools.partial(self._on_generate_error, client),
         )
         if response is None:
             return {}
-        event_data = json.loads(utils.strip_markdown_to_json(response.text or ""))
+        event_data = utils.loads_model_json(response.text or "")
         logger.info("Event data from model", extra={"event_data": event_data})
 
         return event_data
@@ -453,40 +785,46 @@ class GeminiProvider(ModelProvider):
         """Extracts readable content from image bytes and returns plain text."""
         client, settings = self._get_client()
         system_instructions = self._get_system_instructions(settings)
+        request_contents = [
+            (
+                f"Extract all visible text from the image and, if helpful, "
+                f"briefly describe important visual content. Respond in {settings.language}. "
+                f"Return plain text only without any markdown or JSON."
+            ),
+            types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+        ]
+        build_request = self._request_builder(
+            request_contents,
+            system_instructions,
+            thinking_budget=settings.thinking_budget,
+        )
+
         def run_request(spec: config.ModelSpec):
-            self._model_router.record_request(spec)
-            contents, system_instruction = self._prepare_contents(
-                spec,
-                [
-                    (
-                        f"Extract all visible text from the image and, if helpful, "
-                        f"briefly describe important visual content. Respond in {settings.language}. "
-                        f"Return plain text only without any markdown or JSON."
-                    ),
-                    types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
-                ],
-                system_instructions,
-            )
+            contents, request_config = build_request(spec)
             return client.models.generate_content(
                 model=spec.name,
                 contents=contents,
-                config=self._prepare_config(
-                    spec,
-                    system_instruction=system_instruction,
-                    thinking_budget=settings.thinking_budget,
-                ),
+                config=request_config,
             )
 
         response = retry_utils.retry_with_item(
             max_attempts=5,
-            pick_item=lambda: self._model_router.pick_model(settings.gemini_models),
+            pick_item=lambda: self._model_router.pick_and_record(
+                settings.gemini_models
+            ),
             run=run_request,
             on_error=functools.partial(self._on_generate_error, client),
         )
         if response is None:
             return ""
-        return (response.text or "").strip()
+        return _response_text(response)
+
+    def list_models(self) -> Tuple[str, ...]:
+        client, _ = self._get_client()
+        return self._available_model_names(client)
 
-    def list_models(self) -> List[str]:
+    def refresh_models(self) -> Tuple[str, ...]:
+        """Drop the cached model list and fetch it again."""
         client, _ = self._get_client()
-        return [model.name for model in client.models.list() if model.name is not None]
+        self._model_names = (0.0, None)
+        return self._available_model_names(client)
@@ -4,6 +4,8 @@ import os
 from datetime import datetime, timezone
 from typing import Any, Dict
 
+from src import utils
+
 _RESERVED_LOG_RECORD_ATTRS = {
     "name",
     "msg",
@@ -27,6 +29,16 @@ _RESERVED_LOG_RECORD_ATTRS = {
     "processName",
 }
 
+# Everything a bare LogRecord carries (e.g. taskName on 3.12+), plus attributes
+# formatters add; anything else on a record came from `extra=`.
+_BASELINE_LOG_RECORD_ATTRS = (
+    frozenset(logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__)
+    | _RESERVED_LOG_RECORD_ATTRS
+    | {"message", "asctime"}
+)
+
+_JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
 _THIRD_PARTY_LOGGERS = (
     "httpx",
     "httpcore",
@@ -38,6 +50,8 @@ _THIRD_PARTY_LOGGERS = (
 
 
 def _coerce_json_value(value: Any) -> Any:
+    if isinstance(value, _JSON_SCALAR_TYPES):
+        return value
     try:
         json.dumps(value)
         return value
@@ -47,17 +61,36 @@ def _coerce_json_value(value: Any) -> Any:
 
 def _extract_extra(record: logging.LogRecord) -> Dict[str, Any]:
     extras: Dict[str, Any] = {}
+    if record.__dict__.keys() <= _BASELINE_LOG_RECORD_ATTRS:
+        return extras
     for key, value in record.__dict__.items():
-        if key in _RESERVED_LOG_RECORD_ATTRS or key.startswith("_"):
+        if key in _BASELINE_LOG_RECORD_ATTRS or key.startswith("_"):
             continue
         extras[key] = _coerce_json_value(value)
     return extras
 
 
 class JsonFormatter(logging.Formatter):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Bursts of records often share a millisecond; reuse the last ISO string.
+        self._last_ts_key = -1
+        self._last_ts_iso = ""
+
+    def _format_ts(self, created: float) -> str:
+        key = int(created * 1000)
+        if key != self._last_ts_key:
+            # Millisecond precision, so the cached string is exact for every
+            # record that shares the key.
+            self._last_ts_iso = datetime.fromtimestamp(
+                key / 1000, tz=timezone.utc
+            ).isoformat(timespec="milliseconds")
+            self._last_ts_key = key
+        return self._last_ts_iso
+
     def format(self, record: logging.LogRecord) -> str:
         payload: Dict[str, Any] = {
-            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "ts": self._format_ts(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -70,7 +103,11 @@ class JsonFormatter(logging.Formatter):
         if record.stack_info:
             payload["stack"] = self.formatStack(record.stack_info)
         payload.update(_extract_extra(record))
-        return json.dumps(payload, ensure_ascii=False)
+        try:
+            return utils.json_dumps(payload)
+        except TypeError:
+            # orjson is stricter than json (e.g. non-str dict keys in extras).
+            return json.dumps(payload, ensure_ascii=False)
 
 
 def _configure_logging(level: int, log_format: str) -> None:
@@ -119,8 +156,6 @@ def configure_logging(settings) -> None:
 
 
 def update_log_level(level: int) -> None:
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    for handler in root_logger.handlers:
-        handler.setLevel(logging.DEBUG)
+    # The root handler is installed at DEBUG by _configure_logging, so only the
+    # logger levels need to change.
     _configure_scoped_logger_levels(level)
@@ -1,19 +1,29 @@
 import asyncio
+import functools
 import html
 import hashlib
 import io
-import json
 import logging
 import os
 import re
-import tempfile
 import traceback
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, Iterable, Optional, Tuple
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
-import tzlocal
-from telegram import Update, Voice
+from telegram import Update, User, Voice
 from telegram.constants import ChatAction, ParseMode, ReactionEmoji
 from telegram.error import BadRequest
 from telegram.ext import (
@@ -24,8 +34,8 @@ from telegram.ext import (
     filters,
 )
 
-from src import config, logging_utils, utils
-from src.calendar_provider import CalendarProvider
+from src import config, logging_utils, transcript_cache, utils
+from src.calendar_provider import CalendarProvider, local_timezone
 from src.message_store import (
     add_message,
     assemble_context,
@@ -36,7 +46,9 @@ from src.message_store import (
 )
 from src.model_provider import ModelProvider
 from src.provider_factory import build_provider
+from src.rate_limiting import ReplyRateLimiter
 from src.telegram_drafts import send_message_draft
+from src.update_processing import ChatOrderedUpdateProcessor
 
 logging_utils.configure_bootstrap()
 settings = config.get_settings()
@@ -53,6 +65,50 @@ _REACTION_ALLOWED_LIST = sorted(_REACTION_ALLOWED_SET)
 _MESSAGES_SINCE_LAST_REACTION = 0
 _NON_TEXT_REPLY_PLACEHOLDER = "[non-text message]"
 _IMAGE_MAX_BYTES = 15 * 1024 * 1024
+_ADMIN_TRACEBACK_MAX_CHARS = 3000
+_STREAM_END = object()
+_IMAGE_MIME_BY_EXT = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
+
+def _available_cpus() -> int:
+    # os.cpu_count() reports host CPUs inside containers; affinity honours cpusets.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# Model calls are blocking network/CPU work; keep them off the event loop.
+_MODEL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=min(32, _available_cpus() + 4),
+    thread_name_prefix="model",
+)
+
+T = TypeVar("T")
+
+
+async def _run_blocking(func: Callable[..., T], *args: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_MODEL_EXECUTOR, functools.partial(func, *args))
+
+
+async def _iterate_blocking(iterator: Iterator[T]) -> AsyncIterator[T]:
+    # Each step of a provider stream is a blocking read; pull it on the executor
+    # so other chats keep being served between items.
+    while True:
+        item = await _run_blocking(next, iterator, _STREAM_END)
+        if item is _STREAM_END:
+            return
+        yield item
 
 
 def _log_context(update: Optional[Update]) -> dict:
@@ -76,6 +132,25 @@ def _storage_id(update: Update) -> Optional[str]:
     return str(update.effective_chat.id)
 
 
+async def _get_bot_user(bot: Any) -> User:
+    # The bot's own user never changes while the process runs. Bot.bot caches the
+    # last get_me() result (Application.initialize() makes that call), so the
+    # first message does not pay for the lookup.
+    try:
+        return bot.bot
+    except RuntimeError:
+        return await bot.get_me()
+
+
+def _debug_message_preview(message: str, update: Update, text: str) -> None:
+    # Skip building the preview payload unless debug logging is on.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            message,
+            extra={**_log_context(update), "message_preview": text[:256]},
+        )
+
+
 def apply_log_level(settings: config.Settings) -> None:
     global _CURRENT_LOG_LEVEL
     level = logging.DEBUG if settings.debug_mode else logging.INFO
@@ -85,8 +160,37 @@ def apply_log_level(settings: config.Settings) -> None:
     _CURRENT_LOG_LEVEL = level
 
 
-def transcribe_audio(audio_path: str, active_provider: ModelProvider) -> str:
-    return active_provider.transcribe(audio_path)
+def transcribe_audio(
+    audio_bytes: bytes,
+    active_provider: ModelProvider,
+    active_settings: Optional[config.Settings] = None,
+) -> str:
+    cache_settings = active_settings or config.get_settings()
+    if not cache_settings.transcript_cache_enabled:
+        return active_provider.transcribe(audio_bytes)
+
+    # Keyed on the audio and target language only: which provider or model ends
+    # up transcribing depends on routing, quotas and GEMINI_MODELS order.
+    key = transcript_cache.cache_key(audio_bytes, language=cache_settings.language)
+    cached = transcript_cache.load(
+        cache_settings.transcript_cache_dir,
+        key,
+        max_age_secs=cache_settings.transcript_cache_max_age_secs,
+    )
+    if cached is not None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Transcript cache hit", extra={"cache_key": key})
+        return cached
+    text = active_provider.transcribe(audio_bytes)
+    if text:
+        transcript_cache.store(
+            cache_settings.transcript_cache_dir,
+            key,
+            text,
+            max_entries=cache_settings.transcript_cache_max_entries,
+            max_age_secs=cache_settings.transcript_cache_max_age_secs,
+        )
+    return text
 
 
 def _entity_type_value(entity: Any) -> str:
@@ -105,23 +209,38 @@ def _iter_message_entity_blocks(message: Any) -> Iterable[Tuple[str, Iterable[An
         yield caption, getattr(message, "caption_entities", []) or []
 
 
-def _normalized_aliases(aliases: Iterable[str]) -> set[str]:
+@functools.lru_cache(maxsize=16)
+def _normalize_alias_set(aliases: FrozenSet[str]) -> FrozenSet[str]:
     normalized = set()
     for alias in aliases:
         value = str(alias or "").strip().lower().lstrip("@")
         if value:
             normalized.add(value)
-    return normalized
+    return frozenset(normalized)
+
+
+def _normalized_aliases(aliases: Iterable[str]) -> FrozenSet[str]:
+    # Settings hold aliases as a frozenset, so this is a cache hit per message.
+    return _normalize_alias_set(frozenset(aliases))
+
+
+@functools.lru_cache(maxsize=16)
+def _alias_pattern(aliases: FrozenSet[str]) -> Optional[re.Pattern]:
+    # One alternation scans the text once instead of once per alias.
+    if not aliases:
+        return None
+    alternatives = "|".join(
+        re.escape(alias) for alias in sorted(aliases, key=len, reverse=True)
+    )
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
 
 
 def _contains_alias_token(text: str, aliases: Iterable[str]) -> bool:
-    text_lower = str(text or "").lower()
-    if not text_lower:
+    # Case-insensitive matching avoids a lowered copy of every message.
+    if not text:
         return False
-    for alias in _normalized_aliases(aliases):
-        if re.search(rf"(?<!\w){re.escape(alias)}(?!\w)", text_lower):
-            return True
-    return False
+    pattern = _alias_pattern(_normalized_aliases(aliases))
+    return pattern is not None and pattern.search(str(text)) is not None
 
 
 def _is_bot_mentioned(
@@ -129,13 +248,10 @@ def _is_bot_mentioned(
     *,
     bot_username: str,
     bot_id: int,
-    aliases: list[str],
+    aliases: Iterable[str],
     fallback_text: str = "",
 ) -> bool:
-    normalized_aliases = _normalized_aliases(aliases)
-    normalized_username = str(bot_username or "").strip().lower().lstrip("@")
-    if normalized_username:
-        normalized_aliases.add(normalized_username)
+    normalized_aliases = _normalized_aliases((*aliases, bot_username))
 
     for source_text, entities in _iter_message_entity_blocks(message):
         for entity in entities:
@@ -177,20 +293,8 @@ def _should_respond_to_message(
 
 
 def _guess_mime_from_name(name: str) -> str:
-    lowered = str(name or "").lower()
-    if lowered.endswith((".jpg", ".jpeg")):
-        return "image/jpeg"
-    if lowered.endswith(".png"):
-        return "image/png"
-    if lowered.endswith(".webp"):
-        return "image/webp"
-    if lowered.endswith(".gif"):
-        return "image/gif"
-    if lowered.endswith(".bmp"):
-        return "image/bmp"
-    if lowered.endswith((".tif", ".tiff")):
-        return "image/tiff"
-    return ""
+    _, ext = os.path.splitext(str(name or "").lower())
+    return _IMAGE_MIME_BY_EXT.get(ext, "")
 
 
 def _is_image_document(document: Any) -> Tuple[bool, str]:
@@ -210,17 +314,26 @@ def _combine_caption_and_extracted(caption: str, extracted: str) -> str:
     return (caption_clean or extracted_clean).strip()
 
 
+async def _download_file_bytes(
+    file_id: str, context: ContextTypes.DEFAULT_TYPE
+) -> bytes:
+    file = await context.bot.get_file(file_id)
+    bio = io.BytesIO()
+    await file.download_to_memory(bio)
+    return bio.getvalue()
+
+
 async def _extract_text_from_photo_message(
     message: Any, context: ContextTypes.DEFAULT_TYPE
 ) -> str:
     if not getattr(message, "photo", None):
         return ""
-    photo = message.photo[-1]
-    file = await context.bot.get_file(photo.file_id)
-    bio = io.BytesIO()
-    await file.download_to_memory(bio)
-    image_bytes = bio.getvalue()
-    extracted = model_provider.image_to_text(image_bytes, mime_type="image/jpeg")
+    image_bytes = await _download_file_bytes(message.photo[-1].file_id, context)
+    extracted = await _run_blocking(
+        functools.partial(
+            model_provider.image_to_text, image_bytes, mime_type="image/jpeg"
+        )
+    )
     return _combine_caption_and_extracted(getattr(message, "caption", "") or "", extracted)
 
 
@@ -234,13 +347,13 @@ async def _extract_text_from_image_document(
     if not is_image_document:
         return None
 
-    file = await context.bot.get_file(document.file_id)
-    bio = io.BytesIO()
-    await file.download_to_memory(bio)
-    image_bytes = bio.getvalue()
-    extracted = model_provider.image_to_text(
-        image_bytes,
-        mime_type=effective_mime or "image/jpeg",
+    image_bytes = await _download_file_bytes(document.file_id, context)
+    extracted = await _run_blocking(
+        functools.partial(
+            model_provider.image_to_text,
+            image_bytes,
+            mime_type=effective_mime or "image/jpeg",
+        )
     )
     return _combine_caption_and_extracted(getattr(message, "caption", "") or "", extracted)
 
@@ -382,10 +495,10 @@ def _build_reaction_context(chat_id: Optional[str], settings: config.Settings) -
     )
 
 
-def is_allowed(update: Update) -> bool:
+def is_allowed(update: Update, settings: Optional[config.Settings] = None) -> bool:
     if update.effective_chat is None or update.effective_user is None:
         return False
-    settings = config.get_settings()
+    settings = settings or config.get_settings()
     chat_id = str(update.effective_chat.id)
     user_id = str(update.effective_user.id)
     # Allow if chat or user is in the allowed list (if list is not empty)
@@ -407,30 +520,36 @@ def is_allowed(update: Update) -> bool:
     return False
 
 
-async def maybe_react(update: Update, text: str):
+async def maybe_react(
+    update: Update, text: str, settings: Optional[config.Settings] = None
+):
     logger.debug("maybe_react called", extra=_log_context(update))
-    settings = config.get_settings()
+    settings = settings or config.get_settings()
 
     if update.message is None or not settings.reaction_enabled:
         return
     global _REACTION_COUNT, _REACTION_LAST_TS, _MESSAGES_SINCE_LAST_REACTION
     _MESSAGES_SINCE_LAST_REACTION += 1
 
-    _reset_reaction_budget_if_needed(datetime.now())
+    # Most messages stop at one of the cheap checks; only read the wall clock
+    # for the daily budget once everything else allows a reaction.
     if (
         settings.reaction_daily_budget <= 0
-        or _REACTION_COUNT >= settings.reaction_daily_budget
+        or _MESSAGES_SINCE_LAST_REACTION < settings.reaction_messages_threshold
     ):
         return
     if settings.reaction_cooldown_secs > 0:
         if time.monotonic() - _REACTION_LAST_TS < settings.reaction_cooldown_secs:
             return
-    if _MESSAGES_SINCE_LAST_REACTION < settings.reaction_messages_threshold:
+    _reset_reaction_budget_if_needed(datetime.now())
+    if _REACTION_COUNT >= settings.reaction_daily_budget:
         return
 
     storage_id = _storage_id(update)
-    reaction_context = _build_reaction_context(storage_id, settings)
-    if settings.debug_mode:
+    reaction_context = await _run_blocking(
+        _build_reaction_context, storage_id, settings
+    )
+    if logger.isEnabledFor(logging.DEBUG):
         logger.debug(
             "Built reaction context",
             extra={
@@ -441,10 +560,15 @@ async def maybe_react(update: Update, text: str):
             },
         )
 
-    reaction = model_provider.choose_reaction(
-        text,
-        _REACTION_ALLOWED_LIST,
-        context_text=reaction_context,
+    reaction = (
+        await _run_blocking(
+            functools.partial(
+                model_provider.choose_reaction,
+                text,
+                _REACTION_ALLOWED_LIST,
+                context_text=reaction_context,
+            )
+        )
     ).strip()
     if not reaction:
         return
@@ -464,11 +588,11 @@ async def maybe_react(update: Update, text: str):
 
 
 async def hi(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not is_allowed(update):
+    settings = config.get_settings()
+    if not is_allowed(update, settings):
         return
     if update.message is None:
         return
-    settings = config.get_settings()
     if not settings.features.get("commands", {}).get("hi"):
         return
     await update.message.reply_text("Hello! I am your speech-to-text bot.")
@@ -651,29 +775,23 @@ async def view_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def transcribe_voice_message(
-    voice: Voice, context: ContextTypes.DEFAULT_TYPE
+    voice: Voice,
+    context: ContextTypes.DEFAULT_TYPE,
+    active_settings: Optional[config.Settings] = None,
 ) -> str:
     if voice is None:
         return ""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".ogg") as temp_audio:
-        temp_audio_path = temp_audio.name
-    try:
-        file = await context.bot.get_file(voice.file_id)
-        await file.download_to_drive(temp_audio_path)
-        return transcribe_audio(temp_audio_path, model_provider)
-    finally:
-        try:
-            os.remove(temp_audio_path)
-        except OSError:
-            logger.debug(
-                "Failed to remove temporary voice file", extra={"path": temp_audio_path}
-            )
+    audio_bytes = await _download_file_bytes(voice.file_id, context)
+    return await _run_blocking(
+        transcribe_audio, audio_bytes, model_provider, active_settings
+    )
 
 
 async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.debug("handle_addressed_message called", extra=_log_context(update))
+    # One settings snapshot serves the whole update, including the helpers below.
     settings = config.get_settings()
-    if not is_allowed(update) or not settings.features["message_handling"]:
+    if not is_allowed(update, settings) or not settings.features["message_handling"]:
         return
     # ignore if the update is not a message (e.g., a callback, edited message, etc.) or sent by non-user (bot)
     if not update.message or not update.effective_user or not update.effective_chat:
@@ -685,18 +803,12 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
     is_transcribe_text = False
     authored_text = (update.message.text or (update.message.caption or "")).strip()
     if update.message.voice:
-        text = await transcribe_voice_message(update.message.voice, context)
-        logger.debug(
-            "Received voice message",
-            extra={**_log_context(update), "message_preview": text[:256]},
-        )
+        text = await transcribe_voice_message(update.message.voice, context, settings)
+        _debug_message_preview("Received voice message", update, text)
         is_transcribe_text = True
     elif update.message.photo:
         text = await _extract_text_from_photo_message(update.message, context)
-        logger.debug(
-            "Received photo message",
-            extra={**_log_context(update), "message_preview": text[:256]},
-        )
+        _debug_message_preview("Received photo message", update, text)
     elif update.message.document:
         is_image_doc, _ = _is_image_document(update.message.document)
         if not is_image_doc:
@@ -727,16 +839,10 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
             return
 
         text = text_from_document
-        logger.debug(
-            "Received image document",
-            extra={**_log_context(update), "message_preview": text[:256]},
-        )
+        _debug_message_preview("Received image document", update, text)
     else:
         text = authored_text
-        logger.debug(
-            "Received text message",
-            extra={**_log_context(update), "message_preview": text[:256]},
-        )
+        _debug_message_preview("Received text message", update, text)
     sender = update.effective_user.first_name or update.effective_user.name
     storage_id = _storage_id(update)
     if storage_id is None:
@@ -755,9 +861,9 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
         reply_to_telegram_message_id=reply_to_telegram_message_id,
     )
 
-    await maybe_react(update, text)
+    await maybe_react(update, text, settings)
 
-    bot = await context.bot.get_me()
+    bot = await _get_bot_user(context.bot)
     mentioned_bot = _is_bot_mentioned(
         update.message,
         bot_username=bot.username or "",
@@ -797,8 +903,7 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
     if not should_respond:
         if is_transcribe_text:
             # if the message is not addressed to the bot
-            # just send the transcribed text
-            await update.effective_chat.send_action(action=ChatAction.TYPING)
+            # just send the transcribed text (already known, so no typing indicator)
             await update.message.reply_text(text)
         return
 
@@ -809,7 +914,7 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
             chat_id=storage_id,
             context=context,
         )
-        if settings.debug_mode and reply_target_context is not None:
+        if reply_target_context is not None and logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 "Resolved reply target context",
                 extra={
@@ -820,10 +925,14 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
             )
 
     await update.effective_chat.send_action(action=ChatAction.TYPING)
-    context_str = build_context(
-        chat_id=storage_id,
-        latest_user_text=text,
-        summarize_fn=model_provider.generate_low_cost,
+    # History reads and summary refreshes (which may call the model) block.
+    context_str = await _run_blocking(
+        functools.partial(
+            build_context,
+            chat_id=storage_id,
+            latest_user_text=text,
+            summarize_fn=model_provider.generate_low_cost,
+        )
     )
     prompt = _build_prompt(
         context_text=context_str,
@@ -831,7 +940,7 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
         latest_text=text,
         reply_target_context=reply_target_context,
     )
-    if settings.debug_mode:
+    if logger.isEnabledFor(logging.DEBUG):
         # trim the promt in the middle for logging purposes
         if len(prompt) > 1024:
             logger.debug(
@@ -865,7 +974,9 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
         if use_message_drafts:
             response = await _generate_response_with_drafts(update, prompt, settings)
         else:
-            response = (model_provider.generate(prompt) or "").strip()
+            response = (
+                await _run_blocking(model_provider.generate, prompt) or ""
+            ).strip()
         if response:
             break
         logger.warning(
@@ -886,19 +997,15 @@ async def handle_addressed_message(update: Update, context: ContextTypes.DEFAULT
         )
         return
 
-    outgoing_text = response
-    if is_transcribe_text:
-        outgoing_text = f">>{text}\n\n{response}".strip()
+    outgoing_text = (
+        f">>{text}\n\n{response}".strip() if is_transcribe_text else response
+    )
 
-    await send_ai_response(update, outgoing_text, storage_id)
+    await send_ai_response(update, outgoing_text, storage_id, settings)
 
 
-def chunk_string(s: str, chunk_size: int) -> list[str]:
-    if not s:
-        return []
-    if len(s) <= chunk_size:
-        return [s]
-    return [s[i : i + chunk_size] for i in range(0, len(s), chunk_size)]
+def chunk_string(s: str, chunk_size: int) -> Iterator[str]:
+    return (s[i : i + chunk_size] for i in range(0, len(s), chunk_size))
 
 
 def _message_drafts_unavailable_reason(
@@ -906,8 +1013,6 @@ def _message_drafts_unavailable_reason(
 ) -> Optional[str]:
     if not settings.telegram_use_message_drafts:
         return "feature_disabled"
-    if settings.model_provider != "openai":
-        return "provider_not_openai"
     if update.effective_chat is None:
         return "missing_chat"
     if update.effective_chat.type != "private":
@@ -935,7 +1040,7 @@ async def _generate_response_with_drafts(
 ) -> str:
     chat = update.effective_chat
     if chat is None:
-        return (model_provider.generate(prompt) or "").strip()
+        return (await _run_blocking(model_provider.generate, prompt) or "").strip()
 
     draft_id = _build_response_draft_id(update)
     last_sent_draft = ""
@@ -986,7 +1091,8 @@ async def _generate_response_with_drafts(
         last_sent_ts = time.monotonic()
 
     try:
-        for snapshot in model_provider.generate_stream(prompt):
+        stream = iter(model_provider.generate_stream(prompt))
+        async for snapshot in _iterate_blocking(stream):
             stream_text = str(snapshot or "")
             draft_text = stream_text[:4096]
             if not draft_text.strip():
@@ -1020,7 +1126,9 @@ async def _generate_response_with_drafts(
     final_text = stream_text.strip()
     if stream_error is not None and not final_text:
         try:
-            final_text = (model_provider.generate(prompt) or "").strip()
+            final_text = (
+                await _run_blocking(model_provider.generate, prompt) or ""
+            ).strip()
         except Exception as fallback_exc:
             logger.warning(
                 "Fallback generation failed after stream error",
@@ -1039,48 +1147,81 @@ async def _generate_response_with_drafts(
     return final_text
 
 
-async def send_ai_response(update: Update, outgoing_text: str, storage_id: str) -> None:
+async def send_ai_response(
+    update: Update,
+    outgoing_text: str,
+    storage_id: str,
+    settings: Optional[config.Settings] = None,
+) -> None:
     message = update.message
     if message is None:
         return
 
-    settings = config.get_settings()
-    if not settings.telegram_format_ai_replies:
-        for chunk in [
-            chunk for chunk in chunk_string(outgoing_text, 4000) if chunk.strip()
-        ]:
-            await message.reply_text(chunk)
-            add_message("Bot", chunk, chat_id=storage_id, is_bot=True)
-        return
+    settings = settings or config.get_settings()
+    # Chunking is a Telegram transport detail: store the reply as one message,
+    # written once, covering whatever was actually sent.
+    sent_parts: list[str] = []
+    separator = "\n"
+    try:
+        if not settings.telegram_format_ai_replies:
+            separator = ""
+            for chunk in chunk_string(outgoing_text, 4000):
+                if not chunk.strip():
+                    continue
+                await message.reply_text(chunk)
+                sent_parts.append(chunk)
+            return
 
-    html_chunks = [
-        chunk
-        for chunk in utils.build_telegram_html_chunks(outgoing_text, 4000)
-        if chunk.strip()
-    ]
-    for chunk in html_chunks:
-        plain_chunk = utils.telegram_html_to_plain_text(chunk).strip()
-        try:
-            await message.reply_text(chunk, parse_mode=ParseMode.HTML)
-            if plain_chunk:
-                add_message("Bot", plain_chunk, chat_id=storage_id, is_bot=True)
-        except BadRequest as exc:
-            logger.warning(
-                "Failed to send formatted response chunk, falling back to plain text",
-                extra={
-                    **_log_context(update),
-                    "error": str(exc),
-                    "chunk_preview": chunk[:256],
-                },
+        html_chunks = [
+            chunk
+            for chunk in utils.build_telegram_html_chunks(outgoing_text, 4000)
+            if chunk.strip()
+        ]
+        for chunk in html_chunks:
+            plain_chunk = utils.telegram_html_to_plain_text(chunk).strip()
+            try:
+                await message.reply_text(chunk, parse_mode=ParseMode.HTML)
+                if plain_chunk:
+                    sent_parts.append(plain_chunk)
+            except BadRequest as exc:
+                logger.warning(
+                    "Failed to send formatted response chunk, falling back to plain text",
+                    extra={
+                        **_log_context(update),
+                        "error": str(exc),
+                        "chunk_preview": chunk[:256],
+                    },
+                )
+                fallback_chunk = plain_chunk or chunk
+                await message.reply_text(fallback_chunk)
+                sent_parts.append(fallback_chunk)
+    finally:
+        if sent_parts:
+            add_message(
+                "Bot", separator.join(sent_parts), chat_id=storage_id, is_bot=True
             )
-            fallback_chunk = plain_chunk or chunk
-            await message.reply_text(fallback_chunk)
-            add_message("Bot", fallback_chunk, chat_id=storage_id, is_bot=True)
+
+
+def _parse_event_datetime(date_text: str, time_text: str) -> datetime:
+    # fromisoformat is a C fast path, but on 3.11+ it also accepts hour-only
+    # times, seconds, week dates and UTC offsets that strptime rejects. Only take
+    # it for the exact "YYYY-MM-DD" + "HH:MM" shape; strptime handles the rest.
+    if (
+        len(date_text) == 10
+        and date_text[4] == date_text[7] == "-"
+        and len(time_text) == 5
+        and time_text[2] == ":"
+    ):
+        try:
+            return datetime.fromisoformat(f"{date_text}T{time_text}")
+        except ValueError:
+            pass
+    return datetime.strptime(f"{date_text} {time_text}", "%Y-%m-%d %H:%M")
 
 
 async def schedule_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
     settings = config.get_settings()
-    if not is_allowed(update) or not settings.features["schedule_events"]:
+    if not is_allowed(update, settings) or not settings.features["schedule_events"]:
         return
 
     if (
@@ -1095,19 +1236,16 @@ async def schedule_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     await update.effective_chat.send_action(action=ChatAction.TYPING)
 
-    temp_photo_path: Optional[str] = None
     try:
-        # Get the largest photo
-        photo = update.message.photo[-1]
-        file = await context.bot.get_file(photo.file_id)
-
-        # Download the photo
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_photo:
-            temp_photo_path = temp_photo.name
-        await file.download_to_drive(temp_photo_path)
+        # Download the largest photo into memory
+        image_bytes = await _download_file_bytes(
+            update.message.photo[-1].file_id, context
+        )
 
         try:
-            event_data = model_provider.parse_image_to_event(temp_photo_path)
+            event_data = await _run_blocking(
+                model_provider.parse_image_to_event, image_bytes
+            )
 
             if event_data.get("confidence", 0) < 0.5:
                 await update.message.reply_text(
@@ -1138,9 +1276,7 @@ async def schedule_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 event_time = "00:00"
 
             try:
-                naive_datetime = datetime.strptime(
-                    f"{event_data['date']} {event_time}", "%Y-%m-%d %H:%M"
-                )
+                naive_datetime = _parse_event_datetime(event_data["date"], event_time)
             except ValueError as e:
                 logger.error(
                     "Failed to parse datetime",
@@ -1151,7 +1287,7 @@ async def schedule_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
 
             # Get system's local timezone and set it for the datetime
-            local_tz = tzlocal.get_localzone()
+            local_tz = local_timezone()
             start_time = naive_datetime.replace(tzinfo=local_tz)
 
             event = calendar.create_event(
@@ -1204,15 +1340,6 @@ async def schedule_events(update: Update, context: ContextTypes.DEFAULT_TYPE):
             context,
             f"Photo message handling failed for user {update.effective_user.id}: {e}",
         )
-    finally:
-        if temp_photo_path:
-            try:
-                os.remove(temp_photo_path)
-            except OSError:
-                logger.debug(
-                    "Failed to remove temporary photo file",
-                    extra={"path": temp_photo_path, **_log_context(update)},
-                )
 
 
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -1230,11 +1357,12 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
     tb_list = traceback.format_exception(
         None, context.error, context.error.__traceback__
     )
-    tb_string = "".join(tb_list)
+    # The innermost frames are the useful part; the message is capped anyway.
+    tb_string = "".join(tb_list)[-_ADMIN_TRACEBACK_MAX_CHARS:]
     update_str = update.to_dict() if isinstance(update, Update) else str(update)
     message = (
         "An exception was raised while handling an update\n"
-        f"<pre>update = {html.escape(json.dumps(update_str, indent=2, ensure_ascii=False))}"
+        f"<pre>update = {html.escape(utils.json_dumps(update_str, indent=True))}"
         "</pre>\n\n"
         f"<pre>context.chat_data = {html.escape(str(context.chat_data))}</pre>\n\n"
         f"<pre>context.user_data = {html.escape(str(context.user_data))}</pre>\n\n"
@@ -1271,7 +1399,16 @@ async def refresh_settings_job(_: ContextTypes.DEFAULT_TYPE) -> None:
 
 if __name__ == "__main__":
     settings = config.get_settings()
-    app = ApplicationBuilder().token(settings.telegram_bot_token).build()
+    app = (
+        ApplicationBuilder()
+        .token(settings.telegram_bot_token)
+        .concurrent_updates(
+            ChatOrderedUpdateProcessor(settings.telegram_max_concurrent_updates)
+        )
+        # Paces outgoing messages to Telegram's flood limits and retries on 429.
+        .rate_limiter(ReplyRateLimiter())
+        .build()
+    )
     app.add_error_handler(error_handler)
     apply_log_level(settings)
 
@@ -1298,5 +1435,6 @@ if __name__ == "__main__":
     )
     """
 
+    model_provider.warm_up()
     logger.info("Bot started with features: %s", settings.features)
     app.run_polling()
@@ -414,7 +414,7 @@ def _summarize_chunk(
         raw = summarize_fn(prompt).strip()
         if not raw:
             return fallback
-        parsed = json.loads(utils.strip_markdown_to_json(raw))
+        parsed = utils.loads_model_json(raw)
         # Retry once with stricter wording if language does not match.
         combined_text = " ".join(
             [
@@ -432,7 +432,7 @@ def _summarize_chunk(
             )
             raw_retry = summarize_fn(stricter).strip()
             if raw_retry:
-                parsed_retry = json.loads(utils.strip_markdown_to_json(raw_retry))
+                parsed_retry = utils.loads_model_json(raw_retry)
                 if isinstance(parsed_retry, dict):
                     parsed = parsed_retry
         if not isinstance(parsed, dict):
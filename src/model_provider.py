@@ -1,6 +1,9 @@
 # model_provider.py
 class ModelProvider:
-    def transcribe(self, audio_path: str) -> str:
+    def warm_up(self) -> None:
+        """Eagerly build API clients so the first user request does not pay for it."""
+
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
         raise NotImplementedError
 
     def generate_stream(self, prompt: str):
@@ -22,7 +25,9 @@ class ModelProvider:
     ) -> str:
         raise NotImplementedError
 
-    def parse_image_to_event(self, image_path: str) -> dict:
+    def parse_image_to_event(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> dict:
         raise NotImplementedError
 
     def image_to_text(self, image_bytes: bytes, mime_type: str = "image/jpeg") -> str:
@@ -108,6 +108,9 @@ class OpenAIProvider(ModelProvider):
             raise RuntimeError("Failed to initialize OpenAI client")
         return self._client, settings
 
+    def warm_up(self) -> None:
+        self._get_client()
+
     def _is_auth_error(self, exc: Exception) -> bool:
         if isinstance(exc, AuthenticationError):
             return True
@@ -227,7 +230,7 @@ class OpenAIProvider(ModelProvider):
                 raise
         return self._extract_text(response)
 
-    def transcribe(self, audio_path: str) -> str:
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
         raise NotImplementedError("OpenAI transcription is intentionally disabled in this iteration")
 
     def generate_stream(self, prompt: str):
@@ -336,10 +339,12 @@ class OpenAIProvider(ModelProvider):
         logger.warning("OpenAI returned unsupported reaction: %s", text)
         return ""
 
-    def parse_image_to_event(self, image_path: str) -> dict:
+    def parse_image_to_event(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> dict:
+        if not image_bytes:
+            return {}
         _, settings = self._get_client()
-        with open(image_path, "rb") as f:
-            image_bytes = f.read()
         encoded = base64.b64encode(image_bytes).decode("ascii")
         text = self._responses_create(
             model=settings.openai_model,
@@ -355,14 +360,14 @@ class OpenAIProvider(ModelProvider):
                 },
                 {
                     "type": "input_image",
-                    "image_url": f"data:image/jpeg;base64,{encoded}",
+                    "image_url": f"data:{mime_type};base64,{encoded}",
                 },
             ],
         )
         if not text:
             return {}
         try:
-            return json.loads(utils.strip_markdown_to_json(text))
+            return utils.loads_model_json(text)
         except json.JSONDecodeError:
             logger.warning("OpenAI returned non-JSON event payload")
             return {}
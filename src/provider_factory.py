@@ -35,10 +35,27 @@ class RoutedModelProvider(ModelProvider):
             )
             return fallback_fn()
 
-    def transcribe(self, audio_path: str) -> str:
+    def warm_up(self) -> None:
+        for role, provider in (
+            ("primary", self._primary),
+            ("fallback", self._fallback),
+        ):
+            if provider is None:
+                continue
+            # Missing or unreadable credentials surface as RuntimeError from our
+            # auth code or ValueError from the Gemini client.
+            try:
+                provider.warm_up()
+            except (RuntimeError, ValueError) as exc:
+                logger.warning(
+                    "Provider warm-up failed; client will be created on first use",
+                    extra={"provider_role": role, "error": str(exc)},
+                )
+
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
         if self._transcribe_use_fallback and self._fallback is not None:
-            return self._fallback.transcribe(audio_path)
-        return self._primary.transcribe(audio_path)
+            return self._fallback.transcribe(audio_bytes, mime_type=mime_type)
+        return self._primary.transcribe(audio_bytes, mime_type=mime_type)
 
     def generate(self, prompt: str) -> str:
         fallback_fn = (lambda: self._fallback.generate(prompt)) if self._fallback is not None else None
@@ -94,9 +111,25 @@ class RoutedModelProvider(ModelProvider):
             fallback_fn,
         )
 
-    def parse_image_to_event(self, image_path: str) -> dict:
-        fallback_fn = (lambda: self._fallback.parse_image_to_event(image_path)) if self._fallback is not None else None
-        return self._call("parse_image_to_event", lambda: self._primary.parse_image_to_event(image_path), fallback_fn)
+    def parse_image_to_event(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> dict:
+        fallback_fn = (
+            (
+                lambda: self._fallback.parse_image_to_event(
+                    image_bytes, mime_type=mime_type
+                )
+            )
+            if self._fallback is not None
+            else None
+        )
+        return self._call(
+            "parse_image_to_event",
+            lambda: self._primary.parse_image_to_event(
+                image_bytes, mime_type=mime_type
+            ),
+            fallback_fn,
+        )
 
     def image_to_text(self, image_bytes: bytes, mime_type: str = "image/jpeg") -> str:
         fallback_fn = (
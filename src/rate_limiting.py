@@ -0,0 +1,35 @@
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from telegram.ext import AIORateLimiter
+
+# Chat actions and reactions do not count towards Telegram's per-group message
+# limit; queueing them behind it delayed the replies they belong to.
+_GROUP_LIMIT_EXEMPT_ENDPOINTS = frozenset({"sendChatAction", "setMessageReaction"})
+
+# Retries after a RetryAfter (429) before the error is raised to the caller.
+_MAX_RETRIES = 2
+
+
+class ReplyRateLimiter(AIORateLimiter):
+    """AIORateLimiter that retries 429s and only paces messages per group."""
+
+    def __init__(self) -> None:
+        super().__init__(max_retries=_MAX_RETRIES)
+
+    # The signature is fixed by BaseRateLimiter.
+    async def process_request(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ) -> Any:
+        if endpoint in _GROUP_LIMIT_EXEMPT_ENDPOINTS and "chat_id" in data:
+            # The limiter picks its buckets from data["chat_id"]; the request
+            # itself is sent from args/kwargs and is unaffected.
+            data = {key: value for key, value in data.items() if key != "chat_id"}
+        return await super().process_request(
+            callback, args, kwargs, endpoint, data, rate_limit_args
+        )
@@ -0,0 +1,128 @@
+# transcript_cache.py
+"""
+On-disk cache of voice transcriptions keyed by audio content.
+
+Forwarded or re-sent voice messages produce identical audio, so the transcript is
+stored under a SHA-256 of (language, audio bytes) and reused on repeats.
+Entries expire after `max_age_secs` and the directory is pruned to the newest
+`max_entries` on every write. Cache IO failures are logged and never break
+transcription.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(audio_bytes: bytes, *, language: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(language.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(audio_bytes)
+    return digest.hexdigest()
+
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def load(
+    cache_dir: str, key: str, *, max_age_secs: Optional[float] = None
+) -> Optional[str]:
+    path = _entry_path(cache_dir, key)
+    try:
+        if (
+            max_age_secs is not None
+            and time.time() - os.path.getmtime(path) >= max_age_secs
+        ):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning(
+            "Failed to read cached transcript", extra={"path": path, "error": str(exc)}
+        )
+        return None
+    text = payload.get("text") if isinstance(payload, dict) else None
+    return text if isinstance(text, str) else None
+
+
+def store(
+    cache_dir: str,
+    key: str,
+    text: str,
+    *,
+    max_entries: Optional[int] = None,
+    max_age_secs: Optional[float] = None,
+) -> None:
+    path = _entry_path(cache_dir, key)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": text}, f, ensure_ascii=False)
+            # Atomic rename so concurrent readers never see a partial entry.
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as exc:
+        logger.warning(
+            "Failed to write cached transcript", extra={"path": path, "error": str(exc)}
+        )
+    prune(cache_dir, max_entries=max_entries, max_age_secs=max_age_secs)
+
+
+def prune(
+    cache_dir: str,
+    *,
+    max_entries: Optional[int] = None,
+    max_age_secs: Optional[float] = None,
+) -> None:
+    """Remove expired entries and all but the newest `max_entries`."""
+    if max_entries is None and max_age_secs is None:
+        return
+    entries = []
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    continue
+    except OSError as exc:
+        logger.warning(
+            "Failed to scan transcript cache",
+            extra={"path": cache_dir, "error": str(exc)},
+        )
+        return
+    entries.sort(reverse=True)
+    now = time.time()
+    for index, (mtime, path) in enumerate(entries):
+        within_cap = max_entries is None or index < max_entries
+        fresh = max_age_secs is None or now - mtime < max_age_secs
+        if within_cap and fresh:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            logger.warning(
+                "Failed to prune cached transcript",
+                extra={"path": path, "error": str(exc)},
+            )
@@ -0,0 +1,81 @@
+import asyncio
+import sys
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram.ext import BaseUpdateProcessor
+
+_UNBOUNDED_UPDATES = sys.maxsize
+
+
+def _update_chat_id(update: object) -> Optional[int]:
+    chat = getattr(update, "effective_chat", None)
+    return getattr(chat, "id", None)
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates from different chats concurrently, one at a time per chat.
+
+    A slow voice message or model call in one chat no longer delays other chats,
+    while replies within a chat keep the order the messages arrived in.
+    """
+
+    def __init__(self, max_concurrent_updates: int) -> None:
+        # The base class holds its semaphore for the whole of do_process_update,
+        # including the wait for the chat lock, so a burst in one chat would take
+        # every slot. Keep that one unbounded (it is sized from the
+        # max_concurrent_updates property) and only count updates that own their
+        # chat lock.
+        self._limit = _UNBOUNDED_UPDATES
+        super().__init__(_UNBOUNDED_UPDATES)
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        self._limit = max_concurrent_updates
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._active = 0
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._chat_pending: Dict[int, int] = {}
+
+    @property
+    def max_concurrent_updates(self) -> int:
+        return self._limit
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        return self._active
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        async with self._slots:
+            self._active += 1
+            try:
+                await coroutine
+            finally:
+                self._active -= 1
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        chat_id = _update_chat_id(update)
+        if chat_id is None:
+            await self._run(coroutine)
+            return
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        self._chat_pending[chat_id] = self._chat_pending.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                await self._run(coroutine)
+        finally:
+            # Drop idle chats so the lock table does not grow with every chat seen.
+            remaining = self._chat_pending[chat_id] - 1
+            if remaining:
+                self._chat_pending[chat_id] = remaining
+            else:
+                del self._chat_pending[chat_id]
+                del self._chat_locks[chat_id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
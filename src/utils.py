@@ -1,9 +1,17 @@
 import html
+import json
 import re
 from html.parser import HTMLParser
-from typing import List, Optional, Tuple
+from types import ModuleType
+from typing import Any, List, Optional, Tuple
 from urllib.parse import urlparse
 
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
 _ALLOWED_HTML_TAGS = {
     "b",
     "strong",
@@ -37,14 +45,42 @@ _HEADING_RE = re.compile(r"(?m)^[ \t]{0,3}#{1,6}[ \t]+(.+?)\s*$")
 _PLACEHOLDER_RE = re.compile(r"@@TGBLOCK\d+@@")
 
 
+def json_dumps(value: Any, *, indent: bool = False) -> str:
+    """Serialize to JSON (compact, or 2-space indented), keeping non-ASCII text as-is.
+
+    Uses orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value, option=orjson.OPT_INDENT_2 if indent else None
+        ).decode("utf-8")
+    if indent:
+        return json.dumps(value, ensure_ascii=False, indent=2)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
 def strip_markdown_to_json(text: str) -> str:
     text = text.strip()
-    # remove markdown code block markers if present
-    if text.startswith('```json'):
-        text = text[7:]
-    if text.endswith('```'):
-        text = text[:-3]
-    return text.strip()
+    # remove markdown code block markers if present; slice once at the end
+    start, end = 0, len(text)
+    if text.startswith("```json"):
+        start = 7
+    elif text.startswith("```"):
+        newline = text.find("\n")
+        start = newline + 1 if newline != -1 else 3
+    if end - start >= 3 and text.endswith("```"):
+        end -= 3
+    if start == 0 and end == len(text):
+        return text
+    return text[start:end].strip()
+
+
+def loads_model_json(text: str) -> Any:
+    """Parse JSON from a model reply, stripping a markdown fence only if needed."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return json.loads(strip_markdown_to_json(text))
 
 
 def sanitize_telegram_html(text: str) -> str:
@@ -1,5 +1,9 @@
+# pylint: disable=protected-access  # unit tests for private helpers and caches
 from datetime import date, datetime, timedelta, timezone
 from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
 
 from src import calendar_provider
 
@@ -23,13 +27,32 @@ class _FakeEventsApi:
         return _FakeInsert(body)
 
 
+class _FakeBatch:
+    def __init__(self, callback) -> None:
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, request_id):
+        self._requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in reversed(self._requests):
+            self._callback(request_id, request.execute(), None)
+
+
 class _FakeService:
     def __init__(self) -> None:
         self._events = _FakeEventsApi()
+        self.batches = []
 
     def events(self):
         return self._events
 
+    def new_batch_http_request(self, callback):
+        batch = _FakeBatch(callback)
+        self.batches.append(batch)
+        return batch
+
 
 def _provider_without_auth() -> calendar_provider.CalendarProvider:
     provider = calendar_provider.CalendarProvider.__new__(
@@ -61,6 +84,8 @@ def test_create_event_all_day_uses_exclusive_end_date(monkeypatch) -> None:
 def test_create_event_timed_uses_local_timezone_without_utc_shift(monkeypatch) -> None:
     local_tz = timezone(timedelta(hours=3))
     monkeypatch.setattr(calendar_provider.tzlocal, "get_localzone", lambda: local_tz)
+    monkeypatch.delenv("TZ", raising=False)
+    calendar_provider._local_timezone_for.cache_clear()
     monkeypatch.setattr(
         calendar_provider.config,
         "get_settings",
@@ -77,3 +102,143 @@ def test_create_event_timed_uses_local_timezone_without_utc_shift(monkeypatch) -
     assert result["start"]["dateTime"].startswith("2026-01-10T09:30:00+03:00")
     assert result["end"]["dateTime"].startswith("2026-01-10T10:30:00+03:00")
     assert result["start"]["timeZone"] == "UTC+03:00"
+
+
+def test_local_timezone_is_resolved_once(monkeypatch) -> None:
+    calls = []
+
+    def _fake_get_localzone():
+        calls.append(1)
+        return timezone.utc
+
+    monkeypatch.setattr(calendar_provider.tzlocal, "get_localzone", _fake_get_localzone)
+    monkeypatch.delenv("TZ", raising=False)
+    calendar_provider._local_timezone_for.cache_clear()
+
+    assert calendar_provider.local_timezone() is timezone.utc
+    assert calendar_provider.local_timezone() is timezone.utc
+    assert len(calls) == 1
+
+
+def test_local_timezone_follows_tz_changes(monkeypatch) -> None:
+    monkeypatch.setattr(
+        calendar_provider.tzlocal, "get_localzone", lambda: timezone.utc
+    )
+    calendar_provider._local_timezone_for.cache_clear()
+
+    monkeypatch.setenv("TZ", "Europe/Berlin")
+    assert calendar_provider.local_timezone() == ZoneInfo("Europe/Berlin")
+    monkeypatch.setenv("TZ", ":Asia/Tokyo")
+    assert calendar_provider.local_timezone() == ZoneInfo("Asia/Tokyo")
+    monkeypatch.setenv("TZ", "/etc/localtime")
+    assert calendar_provider.local_timezone() is timezone.utc
+
+
+def test_create_events_batches_inserts_and_keeps_order(monkeypatch) -> None:
+    monkeypatch.setattr(
+        calendar_provider.config,
+        "get_settings",
+        lambda: SimpleNamespace(google_calendar_id="calendar-3"),
+    )
+    monkeypatch.setattr(calendar_provider, "_BATCH_MAX_REQUESTS", 2)
+    provider = _provider_without_auth()
+
+    result = provider.create_events(
+        [
+            {
+                "title": f"Day {day}",
+                "is_all_day": True,
+                "start_time": date(2026, 1, day),
+            }
+            for day in (1, 2, 3)
+        ]
+    )
+
+    assert [event["summary"] for event in result] == ["Day 1", "Day 2", "Day 3"]
+    assert len(provider.service.batches) == 2
+
+
+def test_create_events_reports_created_events_on_partial_failure(monkeypatch) -> None:
+    monkeypatch.setattr(
+        calendar_provider.config,
+        "get_settings",
+        lambda: SimpleNamespace(google_calendar_id="calendar-4"),
+    )
+    monkeypatch.setattr(calendar_provider, "_BATCH_MAX_REQUESTS", 2)
+    provider = _provider_without_auth()
+
+    def _raise_quota():
+        raise ValueError("quota")
+
+    events_api = provider.service.events()
+    real_insert = events_api.insert
+
+    def _insert(calendarId, body):  # pylint: disable=invalid-name
+        if body["summary"] == "Day 2":
+            return SimpleNamespace(execute=_raise_quota)
+        return real_insert(calendarId, body)
+
+    monkeypatch.setattr(events_api, "insert", _insert)
+
+    class _CollectingBatch(_FakeBatch):
+        def execute(self):
+            for request_id, request in self._requests:
+                try:
+                    response = request.execute()
+                except ValueError as exc:
+                    self._callback(request_id, None, exc)
+                else:
+                    self._callback(request_id, response, None)
+
+    monkeypatch.setattr(provider.service, "new_batch_http_request", _CollectingBatch)
+
+    with pytest.raises(calendar_provider.CalendarBatchError) as exc_info:
+        provider.create_events(
+            [
+                {
+                    "title": f"Day {day}",
+                    "is_all_day": True,
+                    "start_time": date(2026, 1, day),
+                }
+                for day in (1, 2, 3)
+            ]
+        )
+
+    assert [event["summary"] for event in exc_info.value.created] == ["Day 1", "Day 3"]
+    assert list(exc_info.value.failed) == [1]
+    assert "quota" in str(exc_info.value)
+
+
+def test_authenticate_reuses_built_service(monkeypatch) -> None:
+    built = []
+
+    def _fake_from_info(info, **_kwargs):
+        return ("credentials", info["client_email"])
+
+    def _fake_build(*_args, credentials):
+        built.append(credentials)
+        return _FakeService()
+
+    monkeypatch.setattr(
+        calendar_provider.service_account.Credentials,
+        "from_service_account_info",
+        _fake_from_info,
+    )
+    monkeypatch.setattr(calendar_provider, "build", _fake_build)
+    monkeypatch.setattr(
+        calendar_provider.config,
+        "get_settings",
+        lambda: SimpleNamespace(
+            google_credentials_path=None,
+            google_credentials_json='{"client_email": "bot@example.com"}',
+        ),
+    )
+    calendar_provider._SERVICES.clear()
+
+    first = calendar_provider.CalendarProvider()
+    second = calendar_provider.CalendarProvider()
+
+    assert first.service is second.service
+    assert built == [("credentials", "bot@example.com")]
+    assert all("bot@example.com" not in str(key) for key in calendar_provider._SERVICES)
+    calendar_provider._SERVICES.clear()
@@ -1,3 +1,4 @@
+# pylint: disable=protected-access  # unit tests for private helpers and caches
 import pytest
 
 from src import config
@@ -117,11 +118,13 @@ def test_telegram_use_message_drafts_default_false(monkeypatch) -> None:
     monkeypatch.setenv("OPENAI_API_KEY", "k")
     monkeypatch.delenv("TELEGRAM_USE_MESSAGE_DRAFTS", raising=False)
     monkeypatch.delenv("TELEGRAM_DRAFT_UPDATE_INTERVAL_SECS", raising=False)
+    monkeypatch.delenv("TELEGRAM_MAX_CONCURRENT_UPDATES", raising=False)
     _reset_settings_cache()
 
     settings = config.get_settings(force=True)
     assert settings.telegram_use_message_drafts is False
     assert settings.telegram_draft_update_interval_secs == 0.15
+    assert settings.telegram_max_concurrent_updates == 16
 
 
 def test_telegram_use_message_drafts_can_be_enabled(monkeypatch) -> None:
@@ -132,11 +135,13 @@ def test_telegram_use_message_drafts_can_be_enabled(monkeypatch) -> None:
     monkeypatch.setenv("OPENAI_API_KEY", "k")
     monkeypatch.setenv("TELEGRAM_USE_MESSAGE_DRAFTS", "true")
     monkeypatch.setenv("TELEGRAM_DRAFT_UPDATE_INTERVAL_SECS", "0.1")
+    monkeypatch.setenv("TELEGRAM_MAX_CONCURRENT_UPDATES", "0")
     _reset_settings_cache()
 
     settings = config.get_settings(force=True)
     assert settings.telegram_use_message_drafts is True
     assert settings.telegram_draft_update_interval_secs == 0.1
+    assert settings.telegram_max_concurrent_updates == 1
 
 
 def test_csv_env_values_are_trimmed(monkeypatch) -> None:
@@ -149,8 +154,8 @@ def test_csv_env_values_are_trimmed(monkeypatch) -> None:
     _reset_settings_cache()
 
     settings = config.get_settings(force=True)
-    assert settings.allowed_chat_ids == ["1", "2", "3"]
-    assert settings.bot_aliases == ["botname", "helper"]
+    assert settings.allowed_chat_ids == frozenset({"1", "2", "3"})
+    assert settings.bot_aliases == frozenset({"botname", "helper"})
 
 
 def test_message_handling_and_schedule_events_are_mutually_exclusive(
@@ -167,3 +172,30 @@ def test_message_handling_and_schedule_events_are_mutually_exclusive(
 
     with pytest.raises(RuntimeError, match="mutually exclusive"):
         config.get_settings(force=True)
+
+
+def test_legacy_module_attributes_map_to_settings(monkeypatch) -> None:
+    monkeypatch.setattr(config, "_reload_env", lambda: None)
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "t")
+    monkeypatch.setenv("ALLOWED_CHAT_IDS", "1")
+    monkeypatch.setenv("MODEL_PROVIDER", "openai")
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.setenv("LANGUAGE", "EN")
+    _reset_settings_cache()
+
+    assert config.LANGUAGE == "en"
+    assert config.OPENAI_API_KEY == "k"
+    with pytest.raises(AttributeError):
+        getattr(config, "NOT_A_SETTING")
+
+
+def test_reload_env_checks_dotenv_at_most_once_per_interval(monkeypatch) -> None:
+    calls = []
+    monkeypatch.setattr(config, "_DOTENV_PATH", "")
+    monkeypatch.setattr(config, "_DOTENV_CHECKED_TS", None)
+    monkeypatch.setattr(config, "load_dotenv", lambda **kwargs: calls.append(kwargs))
+
+    config._reload_env()
+    config._reload_env()
+
+    assert len(calls) == 1
@@ -1,8 +1,13 @@
-from datetime import date
+# pylint: disable=protected-access  # unit tests for private helpers and caches
+import os
+import threading
+from datetime import date, datetime
 from types import SimpleNamespace
 
+from google.genai import errors
+
 from src import config
-from src import retry_utils
+from src import gemini_provider, retry_utils
 from src.gemini_provider import GeminiProvider, _ModelUsage
 
 
@@ -21,6 +26,22 @@ def test_model_usage_exhausted_until_next_day() -> None:
     assert usage.can_use(spec, now, next_day)
 
 
+def test_model_usage_rpm_token_bucket_refills_gradually() -> None:
+    usage = _ModelUsage()
+    spec = config.ModelSpec(name="gemini-test", rpm=2, rpd=None)
+    today = date(2024, 1, 1)
+
+    assert usage.can_use(spec, 0.0, today)
+    usage.record_request(spec, 0.0, today)
+    usage.record_request(spec, 0.0, today)
+    assert not usage.can_use(spec, 1.0, today)
+
+    # rpm=2 refills one request every 30 seconds.
+    assert usage.can_use(spec, 30.0, today)
+    usage.record_request(spec, 30.0, today)
+    assert not usage.can_use(spec, 31.0, today)
+
+
 def test_choose_reaction_includes_recent_context(monkeypatch) -> None:
     provider = GeminiProvider()
     settings = SimpleNamespace(
@@ -64,3 +85,469 @@ def test_choose_reaction_includes_recent_context(monkeypatch) -> None:
     assert "Alice: deploy in 10 minutes" in captured["contents"]
     assert "Allowed reactions: 😀, 😴" in captured["contents"]
     assert captured["thinking_budget"] == 0
+
+
+def test_transcribe_prefers_low_cost_model(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[
+            config.ModelSpec(name="gemini-2.5-pro", rpm=None, rpd=None),
+            config.ModelSpec(name="gemini-2.0-flash-lite", rpm=None, rpd=None),
+        ],
+        thinking_budget=1024,
+        language="en",
+    )
+    captured = {}
+
+    def _generate_content(**kwargs):
+        captured["model"] = kwargs["model"]
+        return SimpleNamespace(text=" hello ")
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=_generate_content))
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+    real_prepare_config = provider._prepare_config
+
+    def _capture_prepare_config(*args, **kwargs):
+        captured["thinking_budget"] = kwargs.get("thinking_budget")
+        return real_prepare_config(*args, **kwargs)
+
+    monkeypatch.setattr(provider, "_prepare_config", _capture_prepare_config)
+
+    assert provider.transcribe(b"OggS") == "hello"
+    assert captured["model"] == "gemini-2.0-flash-lite"
+    assert captured["thinking_budget"] == 0
+
+
+def test_transcribe_skips_models_without_audio_input(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[
+            config.ModelSpec(name="gemini-2.5-flash", rpm=None, rpd=None),
+            config.ModelSpec(name="gemma-3-27b-it", rpm=None, rpd=None),
+        ],
+        thinking_budget=0,
+        language="en",
+    )
+    requested = []
+
+    def _generate_content(**kwargs):
+        requested.append(kwargs["model"])
+        return SimpleNamespace(text="hello")
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=_generate_content))
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+
+    assert provider.transcribe(b"OggS") == "hello"
+    assert requested == ["gemini-2.5-flash"]
+
+
+def test_generate_resolves_client_once(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)],
+        thinking_budget=0,
+        use_google_search=False,
+        ai_system_instructions_path="",
+    )
+    calls = []
+
+    client = SimpleNamespace(
+        models=SimpleNamespace(
+            generate_content=lambda **_kwargs: SimpleNamespace(text=" answer ")
+        )
+    )
+
+    def _fake_get_client():
+        calls.append(1)
+        return client, settings
+
+    monkeypatch.setattr(provider, "_get_client", _fake_get_client)
+
+    assert provider.generate("question") == "answer"
+    assert len(calls) == 1
+
+
+def test_system_instructions_are_read_once_outside_debug_mode(tmp_path) -> None:
+    provider = GeminiProvider()
+    instructions = tmp_path / "instructions.txt"
+    instructions.write_text("v1", encoding="utf-8")
+    settings = SimpleNamespace(
+        ai_system_instructions_path=str(instructions), debug_mode=False
+    )
+
+    assert provider._get_system_instructions(settings) == "v1"
+    instructions.write_text("version 2", encoding="utf-8")
+    os.utime(instructions, (1, 1))
+    assert provider._get_system_instructions(settings) == "v1"
+
+    debug_settings = SimpleNamespace(
+        ai_system_instructions_path=str(instructions), debug_mode=True
+    )
+    provider._system_instructions_checked_ts = 0.0
+    assert provider._get_system_instructions(debug_settings) == "version 2"
+    instructions.write_text("version 3", encoding="utf-8")
+    # Within the recheck interval the cached text is served without a stat.
+    assert provider._get_system_instructions(debug_settings) == "version 2"
+
+
+def test_prepare_config_reuses_configs_per_combination() -> None:
+    provider = GeminiProvider()
+    flash = config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)
+    gemma = config.ModelSpec(name="gemma-3-27b-it", rpm=None, rpd=None)
+
+    first = provider._prepare_config(
+        flash, system_instruction="sys", thinking_budget=128, use_google_search=True
+    )
+    second = provider._prepare_config(
+        flash, system_instruction="sys", thinking_budget=128, use_google_search=True
+    )
+    gemma_config = provider._prepare_config(
+        gemma, system_instruction=None, thinking_budget=128, use_google_search=True
+    )
+
+    assert first is second
+    assert first.tools and first.thinking_config.thinking_budget == 128
+    assert gemma_config.tools is None
+    assert gemma_config.thinking_config is None
+
+
+def test_available_model_names_are_cached() -> None:
+    provider = GeminiProvider()
+    calls = []
+
+    def _list_models():
+        calls.append(1)
+        return [
+            SimpleNamespace(name="models/gemini-2.0-flash"),
+            SimpleNamespace(name=None),
+        ]
+
+    client = SimpleNamespace(models=SimpleNamespace(list=_list_models))
+
+    assert provider._available_model_names(client) == ("models/gemini-2.0-flash",)
+    assert provider._available_model_names(client) == ("models/gemini-2.0-flash",)
+    assert len(calls) == 1
+
+
+def test_providers_share_client_per_api_key(monkeypatch) -> None:
+    created = []
+
+    def _fake_client(api_key: str) -> SimpleNamespace:
+        created.append(api_key)
+        return SimpleNamespace()
+
+    settings = SimpleNamespace(google_api_key="key-1")
+    monkeypatch.setattr(gemini_provider.genai, "Client", _fake_client)
+    monkeypatch.setattr(gemini_provider, "_CLIENTS", {})
+    monkeypatch.setattr(gemini_provider.config, "get_settings", lambda: settings)
+
+    first, _ = GeminiProvider()._get_client()
+    second, _ = GeminiProvider()._get_client()
+
+    assert first is second
+    assert created == ["key-1"]
+
+
+def test_list_models_uses_snapshot_until_refreshed(monkeypatch) -> None:
+    provider = GeminiProvider()
+    calls = []
+
+    def _list_models():
+        calls.append(1)
+        return [SimpleNamespace(name=f"models/m{len(calls)}")]
+
+    client = SimpleNamespace(models=SimpleNamespace(list=_list_models))
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, None))
+
+    assert provider.list_models() == ("models/m1",)
+    assert provider.list_models() == ("models/m1",)
+    assert provider.refresh_models() == ("models/m2",)
+    assert len(calls) == 2
+
+
+def test_parse_image_to_event_fills_year_into_prompt(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[config.ModelSpec(name="gemma-3-27b-it", rpm=None, rpd=None)],
+        thinking_budget=0,
+        ai_system_instructions_path="",
+    )
+    captured = {}
+
+    def _generate_content(**kwargs):
+        captured["contents"] = kwargs["contents"]
+        return SimpleNamespace(text='```json\n{"title": "Concert"}\n```')
+
+    client = SimpleNamespace(models=SimpleNamespace(generate_content=_generate_content))
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+
+    assert provider.parse_image_to_event(b"\xff\xd8jpeg") == {"title": "Concert"}
+    prompt, image_part = captured["contents"]
+    assert prompt.endswith(f"current year ({datetime.now().year})")
+    assert image_part.inline_data.data == b"\xff\xd8jpeg"
+
+
+def _quota_error(details: list) -> errors.ClientError:
+    return errors.ClientError(
+        429,
+        {
+            "error": {
+                "code": 429,
+                "status": "RESOURCE_EXHAUSTED",
+                "message": "quota",
+                "details": details,
+            }
+        },
+    )
+
+
+def test_rate_limit_with_retry_delay_cools_model_down() -> None:
+    provider = GeminiProvider()
+    spec = config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)
+    exc = _quota_error(
+        [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "30s"}]
+    )
+
+    assert provider._on_generate_error(None, spec, 1, 5, exc)
+
+    usage = provider._model_router._usage_by_model[spec.name]
+    assert usage.exhausted_until_day is None
+    assert usage.cooldown_until > 0
+    assert provider._model_router.pick_model([spec]) is None
+
+
+def test_quota_error_without_retry_hint_exhausts_model_for_the_day() -> None:
+    provider = GeminiProvider()
+    spec = config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)
+
+    assert provider._on_generate_error(None, spec, 1, 5, _quota_error([]))
+
+    usage = provider._model_router._usage_by_model[spec.name]
+    assert usage.exhausted_until_day is not None
+
+
+def test_daily_quota_error_exhausts_model_despite_retry_delay() -> None:
+    provider = GeminiProvider()
+    spec = config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)
+    exc = _quota_error(
+        [
+            {
+                "@type": "type.googleapis.com/google.rpc.QuotaFailure",
+                "violations": [
+                    {
+                        "quotaMetric": "generativelanguage.googleapis.com/generate_content_free_tier_requests",
+                        "quotaId": "GenerateRequestsPerDayPerProjectPerModel-FreeTier",
+                    }
+                ],
+            },
+            {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "42s"},
+        ]
+    )
+
+    assert provider._on_generate_error(None, spec, 1, 5, exc)
+
+    usage = provider._model_router._usage_by_model[spec.name]
+    assert usage.exhausted_until_day is not None
+    assert usage.cooldown_until == 0.0
+
+
+def test_today_is_cached_between_calls(monkeypatch) -> None:
+    calls = []
+    real_datetime = gemini_provider.datetime
+
+    def _now():
+        calls.append(1)
+        return real_datetime(2024, 1, 1, 12, 0)
+
+    monkeypatch.setattr(
+        gemini_provider,
+        "datetime",
+        SimpleNamespace(now=_now, combine=real_datetime.combine),
+    )
+    router = gemini_provider._ModelRouter()
+
+    assert router._today(1000.0) == date(2024, 1, 1)
+    assert router._today(1030.0) == date(2024, 1, 1)
+    assert len(calls) == 1
+    router._today(1061.0)
+    assert len(calls) == 2
+
+
+def test_empty_media_skips_model_calls(monkeypatch) -> None:
+    provider = GeminiProvider()
+
+    def _fail_get_client():
+        raise AssertionError("client should not be requested for empty media")
+
+    monkeypatch.setattr(provider, "_get_client", _fail_get_client)
+
+    assert provider.transcribe(b"") == ""
+    assert provider.parse_image_to_event(b"") == {}
+
+
+def test_request_builder_reuses_payload_per_capability_group(monkeypatch) -> None:
+    provider = GeminiProvider()
+    calls = []
+    real_prepare_contents = provider._prepare_contents
+
+    def _counting_prepare_contents(*args, **kwargs):
+        calls.append(1)
+        return real_prepare_contents(*args, **kwargs)
+
+    monkeypatch.setattr(provider, "_prepare_contents", _counting_prepare_contents)
+    build = provider._request_builder("hi", "sys", thinking_budget=0)
+    gemma = config.ModelSpec(name="gemma-3-27b-it", rpm=None, rpd=None)
+    other_gemma = config.ModelSpec(name="gemma-3-12b-it", rpm=None, rpd=None)
+    flash = config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)
+
+    assert build(gemma) is build(other_gemma)
+    assert build(gemma)[0] == "sys\n\nhi"
+    assert build(flash)[0] == "hi"
+    assert len(calls) == 2
+
+
+def test_pick_and_record_counts_the_picked_model() -> None:
+    router = gemini_provider._ModelRouter()
+    limited = config.ModelSpec(name="gemini-2.5-pro", rpm=None, rpd=1)
+    fallback = config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)
+
+    assert router.pick_and_record([limited, fallback]) is limited
+    assert router.pick_and_record([limited, fallback]) is fallback
+    assert router.pick_model([limited]) is None
+
+
+def test_concurrent_picks_do_not_exceed_daily_limit() -> None:
+    router = gemini_provider._ModelRouter()
+    limited = config.ModelSpec(name="gemini-2.5-pro", rpm=None, rpd=5)
+    start = threading.Barrier(16)
+    picks = []
+
+    def _pick() -> None:
+        start.wait()
+        for _ in range(10):
+            picks.append(router.pick_and_record([limited]))
+
+    threads = [threading.Thread(target=_pick) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(1 for spec in picks if spec is limited) == 5
+
+
+def test_generate_stream_yields_cumulative_snapshots(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)],
+        thinking_budget=0,
+        use_google_search=False,
+        ai_system_instructions_path="",
+    )
+    requested = []
+
+    def _generate_content_stream(**kwargs):
+        requested.append(kwargs["model"])
+        for text in ("Hel", None, "lo", " world"):
+            yield SimpleNamespace(text=text)
+
+    client = SimpleNamespace(
+        models=SimpleNamespace(generate_content_stream=_generate_content_stream)
+    )
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+
+    assert list(provider.generate_stream("hi")) == ["Hel", "Hello", "Hello world"]
+    assert requested == ["gemini-2.0-flash"]
+
+
+def test_generate_stream_closes_streams_on_retry_and_early_stop(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[
+            config.ModelSpec(name="gemini-2.5-pro", rpm=None, rpd=None),
+            config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None),
+        ],
+        thinking_budget=0,
+        use_google_search=False,
+        ai_system_instructions_path="",
+    )
+    closed = []
+
+    def _chunks(model: str):
+        try:
+            if model == "gemini-2.5-pro":
+                raise _quota_error([])
+            yield SimpleNamespace(text="one")
+            yield SimpleNamespace(text=" two")
+        finally:
+            closed.append(model)
+
+    def _generate_content_stream(**kwargs):
+        return _chunks(kwargs["model"])
+
+    client = SimpleNamespace(
+        models=SimpleNamespace(generate_content_stream=_generate_content_stream)
+    )
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+
+    stream = provider.generate_stream("hi")
+    assert next(stream) == "one"
+    stream.close()
+
+    assert closed == ["gemini-2.5-pro", "gemini-2.0-flash"]
+
+
+def test_generate_stream_logs_empty_response(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None)],
+        thinking_budget=0,
+        use_google_search=False,
+        ai_system_instructions_path="",
+    )
+    blocked = SimpleNamespace(text=None, candidates=[], prompt_feedback=None)
+    logged = []
+
+    def _generate_content_stream(**_kwargs):
+        yield blocked
+
+    client = SimpleNamespace(
+        models=SimpleNamespace(generate_content_stream=_generate_content_stream)
+    )
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+    monkeypatch.setattr(
+        provider,
+        "_log_empty_generation_response",
+        lambda model_name, response: logged.append((model_name, response)),
+    )
+
+    assert not list(provider.generate_stream("hi"))
+    assert logged == [("gemini-2.0-flash", blocked)]
+
+
+def test_generate_stream_moves_to_next_model_on_quota_error(monkeypatch) -> None:
+    provider = GeminiProvider()
+    settings = SimpleNamespace(
+        gemini_models=[
+            config.ModelSpec(name="gemini-2.5-pro", rpm=None, rpd=None),
+            config.ModelSpec(name="gemini-2.0-flash", rpm=None, rpd=None),
+        ],
+        thinking_budget=0,
+        use_google_search=False,
+        ai_system_instructions_path="",
+    )
+    requested = []
+
+    def _generate_content_stream(**kwargs):
+        requested.append(kwargs["model"])
+        if kwargs["model"] == "gemini-2.5-pro":
+            raise _quota_error([])
+        yield SimpleNamespace(text="ok")
+
+    client = SimpleNamespace(
+        models=SimpleNamespace(generate_content_stream=_generate_content_stream)
+    )
+    monkeypatch.setattr(provider, "_get_client", lambda: (client, settings))
+
+    assert list(provider.generate_stream("hi")) == ["ok"]
+    assert requested == ["gemini-2.5-pro", "gemini-2.0-flash"]
@@ -0,0 +1,79 @@
+# pylint: disable=protected-access  # unit tests for private helpers and caches
+import json
+import logging
+
+from src import logging_utils
+
+
+def _make_record(**extra) -> logging.LogRecord:
+    logger = logging.getLogger("src.test")
+    return logger.makeRecord(
+        "src.test",
+        logging.INFO,
+        __file__,
+        10,
+        "hello %s",
+        ("world",),
+        None,
+        extra=extra,
+    )
+
+
+def test_json_formatter_includes_only_user_extras() -> None:
+    payload = json.loads(
+        logging_utils.JsonFormatter().format(_make_record(chat_id="42", obj=object()))
+    )
+
+    assert payload["message"] == "hello world"
+    assert payload["chat_id"] == "42"
+    assert payload["obj"].startswith("<object object")
+    assert "taskName" not in payload
+    assert "processName" not in payload
+
+
+def test_extract_extra_is_empty_without_extras() -> None:
+    assert not logging_utils._extract_extra(_make_record())
+
+
+def test_json_formatter_reuses_timestamp_within_millisecond() -> None:
+    formatter = logging_utils.JsonFormatter()
+    first = _make_record()
+    second = _make_record()
+    later = _make_record()
+    first.created = 1700000000.1234
+    second.created = 1700000000.1236
+    later.created = 1700000000.125
+
+    assert json.loads(formatter.format(first))["ts"] == "2023-11-14T22:13:20.123+00:00"
+    assert json.loads(formatter.format(second))["ts"] == "2023-11-14T22:13:20.123+00:00"
+    assert json.loads(formatter.format(later))["ts"] == "2023-11-14T22:13:20.125+00:00"
+
+
+def test_json_formatter_falls_back_to_stdlib_json(monkeypatch) -> None:
+    def _strict_dumps(value):
+        raise TypeError("Dict key must be str")
+
+    monkeypatch.setattr(logging_utils.utils, "json_dumps", _strict_dumps)
+
+    payload = json.loads(
+        logging_utils.JsonFormatter().format(_make_record(counts={1: 2}))
+    )
+
+    assert payload["counts"] == {"1": 2}
+
+
+def test_update_log_level_only_changes_scoped_loggers() -> None:
+    handler = logging.StreamHandler()
+    handler.setLevel(logging.WARNING)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    app_logger = logging.getLogger("src")
+    previous_level = app_logger.level
+    try:
+        logging_utils.update_log_level(logging.DEBUG)
+
+        assert app_logger.level == logging.DEBUG
+        assert handler.level == logging.WARNING
+    finally:
+        root.removeHandler(handler)
+        app_logger.setLevel(previous_level)
@@ -1,14 +1,17 @@
+# pylint: disable=protected-access  # unit tests for private helpers and caches
 import asyncio
 import importlib
 import sys
 import threading
 from types import SimpleNamespace
 
+import pytest
+
 from src import config, provider_factory
 
 
-class _DummyProvider:
-    def transcribe(self, audio_path: str) -> str:
+class _DummyProvider:  # pylint: disable=unused-argument
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
         return ""
 
     def generate(self, prompt: str) -> str:
@@ -25,7 +28,9 @@ class _DummyProvider:
     ) -> str:
         return ""
 
-    def parse_image_to_event(self, image_path: str) -> dict:
+    def parse_image_to_event(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> dict:
         return {}
 
     def image_to_text(self, image_bytes: bytes, mime_type: str = "image/jpeg") -> str:
@@ -107,6 +112,16 @@ def test_is_bot_mentioned_avoids_substring_false_positive(monkeypatch) -> None:
     )
 
 
+def test_contains_alias_token_matches_any_alias_as_whole_word(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+
+    assert main._contains_alias_token("hey Kaban, help", ["cab", "@kaban"])
+    assert main._contains_alias_token("Слышь, БОТ, помоги", ["бот"])
+    assert main._contains_alias_token("ask c.a.b please", ["c.a.b"])
+    assert not main._contains_alias_token("cabinet", ["cab", "kaban"])
+    assert not main._contains_alias_token("anything", [])
+
+
 def test_should_respond_trigger_matrix(monkeypatch) -> None:
     main = _load_main(monkeypatch)
 
@@ -310,7 +325,7 @@ class _DraftSchedulingProbeProvider(_DummyProvider):
         yield "hello"
 
 
-def test_should_use_message_drafts_private_openai_only(monkeypatch) -> None:
+def test_should_use_message_drafts_private_chats_only(monkeypatch) -> None:
     main = _load_main(monkeypatch)
     update_private = SimpleNamespace(effective_chat=SimpleNamespace(type="private"))
     update_group = SimpleNamespace(effective_chat=SimpleNamespace(type="group"))
@@ -325,7 +340,7 @@ def test_should_use_message_drafts_private_openai_only(monkeypatch) -> None:
 
     assert main._should_use_message_drafts(update_private, openai_settings) is True
     assert main._should_use_message_drafts(update_group, openai_settings) is False
-    assert main._should_use_message_drafts(update_private, gemini_settings) is False
+    assert main._should_use_message_drafts(update_private, gemini_settings) is True
 
 
 def test_message_drafts_unavailable_reason(monkeypatch) -> None:
@@ -352,8 +367,7 @@ def test_message_drafts_unavailable_reason(monkeypatch) -> None:
         == "feature_disabled"
     )
     assert (
-        main._message_drafts_unavailable_reason(update_private, gemini_settings)
-        == "provider_not_openai"
+        main._message_drafts_unavailable_reason(update_private, gemini_settings) is None
     )
     assert (
         main._message_drafts_unavailable_reason(update_without_chat, openai_settings)
@@ -533,3 +547,239 @@ def test_build_response_draft_id_is_positive_int(monkeypatch) -> None:
 
     assert isinstance(draft_id, int)
     assert draft_id > 0
+
+
+def test_run_blocking_executes_off_event_loop_thread(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    loop_thread = {}
+
+    async def _run():
+        loop_thread["id"] = threading.get_ident()
+        return await main._run_blocking(lambda value: (value, threading.get_ident()), 5)
+
+    value, worker_thread = asyncio.run(_run())
+
+    assert value == 5
+    assert worker_thread != loop_thread["id"]
+
+
+def test_photo_text_extraction_runs_model_off_event_loop(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    captured = {}
+
+    async def _download_to_memory(bio) -> None:
+        bio.write(b"jpeg")
+
+    async def _get_file(file_id):
+        captured["file_id"] = file_id
+        return SimpleNamespace(download_to_memory=_download_to_memory)
+
+    def _image_to_text(image_bytes, mime_type="image/jpeg"):
+        captured["thread"] = threading.get_ident()
+        captured["bytes"] = image_bytes
+        captured["mime_type"] = mime_type
+        return "poster text"
+
+    monkeypatch.setattr(main.model_provider, "image_to_text", _image_to_text)
+    context = SimpleNamespace(bot=SimpleNamespace(get_file=_get_file))
+    message = SimpleNamespace(
+        photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id="large")],
+        caption="caption",
+    )
+
+    async def _run():
+        captured["loop_thread"] = threading.get_ident()
+        return await main._extract_text_from_photo_message(message, context)
+
+    assert asyncio.run(_run()) == "caption\nposter text"
+    assert captured["file_id"] == "large"
+    assert captured["bytes"] == b"jpeg"
+    assert captured["mime_type"] == "image/jpeg"
+    assert captured["thread"] != captured["loop_thread"]
+
+
+def test_get_bot_user_fetches_once(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    calls = []
+
+    class _UninitializedBot:
+        # Mirrors telegram.Bot: get_me() caches its result on .bot.
+        def __init__(self) -> None:
+            self.me = None
+
+        @property
+        def bot(self):
+            if self.me is None:
+                raise RuntimeError("not initialized")
+            return self.me
+
+        async def get_me(self):
+            calls.append(1)
+            self.me = SimpleNamespace(id=42, username="kaban")
+            return self.me
+
+    bot = _UninitializedBot()
+
+    async def _run():
+        return await main._get_bot_user(bot), await main._get_bot_user(bot)
+
+    first, second = asyncio.run(_run())
+
+    assert first is second
+    assert len(calls) == 1
+
+
+def test_chunk_string_yields_fixed_size_chunks(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+
+    assert list(main.chunk_string("abcdefg", 3)) == ["abc", "def", "g"]
+    assert not list(main.chunk_string("", 3))
+
+
+def test_parse_event_datetime_accepts_iso_and_loose_times(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+
+    assert main._parse_event_datetime("2024-05-01", "19:30") == main.datetime(
+        2024, 5, 1, 19, 30
+    )
+    assert main._parse_event_datetime("2024-05-01", "9:05") == main.datetime(
+        2024, 5, 1, 9, 5
+    )
+
+
+def test_parse_event_datetime_rejects_what_strptime_rejects(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+
+    for date_text, time_text in (
+        ("2024-05-01", "10"),
+        ("2024-05-01", "10:30:15"),
+        ("2024-05-01", "10:30+05:00"),
+        ("2024-W18-3", "10:30"),
+    ):
+        with pytest.raises(ValueError):
+            main._parse_event_datetime(date_text, time_text)
+
+
+def test_send_ai_response_stores_multi_chunk_reply_once(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    sent = []
+    stored = []
+
+    async def _reply_text(text, **_kwargs):
+        sent.append(text)
+
+    monkeypatch.setattr(
+        main, "add_message", lambda sender, text, **_kwargs: stored.append(text)
+    )
+    update = SimpleNamespace(message=SimpleNamespace(reply_text=_reply_text))
+    settings = SimpleNamespace(telegram_format_ai_replies=False)
+    reply = "a" * 4000 + "b" * 10
+
+    asyncio.run(main.send_ai_response(update, reply, "chat", settings))
+
+    assert sent == ["a" * 4000, "b" * 10]
+    assert stored == [reply]
+
+
+def test_guess_mime_from_name_uses_extension(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+
+    assert main._guess_mime_from_name("Poster.JPG") == "image/jpeg"
+    assert main._guess_mime_from_name("scan.tiff") == "image/tiff"
+    assert main._guess_mime_from_name("notes.txt") == ""
+    assert main._guess_mime_from_name("") == ""
+
+
+def test_get_bot_user_reuses_startup_get_me(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    me = SimpleNamespace(id=42, username="kaban")
+
+    async def _get_me():
+        raise AssertionError("get_me should not be called after initialize")
+
+    bot = SimpleNamespace(bot=me, get_me=_get_me)
+
+    assert asyncio.run(main._get_bot_user(bot)) is me
+
+
+def test_is_bot_mentioned_does_not_grow_aliases(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    aliases = ["cab"]
+    message = SimpleNamespace(
+        text="hello", entities=[], caption="", caption_entities=[]
+    )
+
+    for _ in range(3):
+        main._is_bot_mentioned(
+            message, bot_username="Kaban", bot_id=42, aliases=aliases
+        )
+
+    assert aliases == ["cab"]
+    assert main._normalized_aliases((*aliases, "Kaban")) == frozenset({"cab", "kaban"})
+    assert isinstance(main.config.get_settings().bot_aliases, frozenset)
+
+
+def test_generate_response_with_drafts_reads_stream_off_event_loop(monkeypatch) -> None:
+    main = _load_main(monkeypatch)
+    stream_threads = []
+
+    class _ThreadRecordingProvider(_DummyProvider):
+        def generate_stream(self, prompt: str):
+            stream_threads.append((prompt, threading.get_ident()))
+            yield "hello"
+
+    async def _fake_send_message_draft(**_kwargs):
+        return True
+
+    monkeypatch.setattr(main, "model_provider", _ThreadRecordingProvider())
+    monkeypatch.setattr(main, "send_message_draft", _fake_send_message_draft)
+    update = SimpleNamespace(
+        effective_chat=SimpleNamespace(id=7, type="private"),
+        message=SimpleNamespace(message_id=77),
+        effective_user=SimpleNamespace(id=1),
+        update_id=1,
+    )
+    settings = SimpleNamespace(
+        telegram_bot_token="test-token",
+        telegram_draft_update_interval_secs=0.0,
+    )
+
+    async def _run():
+        return threading.get_ident(), await main._generate_response_with_drafts(
+            update, "p", settings
+        )
+
+    loop_thread, response = asyncio.run(_run())
+
+    assert response == "hello"
+    assert len(stream_threads) == 1
+    prompt, stream_thread = stream_threads[0]
+    assert prompt == "p"
+    assert stream_thread != loop_thread
+
+
+def test_transcribe_audio_uses_given_settings_and_cache(monkeypatch, tmp_path) -> None:
+    main = _load_main(monkeypatch)
+    settings = SimpleNamespace(
+        transcript_cache_enabled=True,
+        transcript_cache_dir=str(tmp_path),
+        transcript_cache_max_entries=10,
+        transcript_cache_max_age_secs=3600.0,
+        language="ru",
+    )
+    calls = []
+
+    def _transcribe(audio_bytes: bytes) -> str:
+        calls.append(audio_bytes)
+        return "привет"
+
+    provider = SimpleNamespace(transcribe=_transcribe)
+
+    def _unexpected_get_settings():
+        raise AssertionError("settings snapshot should be passed in")
+
+    monkeypatch.setattr(main.config, "get_settings", _unexpected_get_settings)
+
+    assert main.transcribe_audio(b"OggS", provider, settings) == "привет"
+    assert main.transcribe_audio(b"OggS", provider, settings) == "привет"
+    assert calls == [b"OggS"]
@@ -317,3 +317,14 @@ def test_choose_reaction_includes_recent_context(monkeypatch) -> None:
     assert "Recent context:" in captured["prompt"]
     assert "Alice: deploy in 10 minutes" in captured["prompt"]
     assert "Allowed reactions: 😀, 😴" in captured["prompt"]
+
+
+def test_parse_image_to_event_skips_empty_image(monkeypatch) -> None:
+    provider = OpenAIProvider()
+
+    def _fail_get_client():
+        raise AssertionError("client should not be requested for an empty image")
+
+    monkeypatch.setattr(provider, "_get_client", _fail_get_client)
+
+    assert provider.parse_image_to_event(b"") == {}
@@ -3,8 +3,8 @@ from src.provider_factory import RoutedModelProvider
 
 
 class _OkProvider(ModelProvider):
-    def transcribe(self, audio_path: str) -> str:
-        return f"t:{audio_path}"
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
+        return f"t:{mime_type}:{len(audio_bytes)}"
 
     def generate(self, prompt: str) -> str:
         return f"g:{prompt}"
@@ -20,8 +20,10 @@ class _OkProvider(ModelProvider):
     ) -> str:
         return allowed_reactions[0]
 
-    def parse_image_to_event(self, image_path: str) -> dict:
-        return {"path": image_path}
+    def parse_image_to_event(
+        self, image_bytes: bytes, mime_type: str = "image/jpeg"
+    ) -> dict:
+        return {"mime_type": mime_type, "size": len(image_bytes)}
 
     def image_to_text(self, image_bytes: bytes, mime_type: str = "image/jpeg") -> str:
         return f"{mime_type}:{len(image_bytes)}"
@@ -44,8 +46,8 @@ class _PartialFailGenerateStreamProvider(_OkProvider):
 
 
 class _FallbackTranscribeProvider(_OkProvider):
-    def transcribe(self, audio_path: str) -> str:
-        return f"fallback:{audio_path}"
+    def transcribe(self, audio_bytes: bytes, mime_type: str = "audio/ogg") -> str:
+        return f"fallback:{mime_type}:{len(audio_bytes)}"
 
 
 class _FailReactionProvider(_OkProvider):
@@ -83,7 +85,7 @@ def test_routed_provider_uses_fallback_for_transcribe_when_forced() -> None:
         fallback=_FallbackTranscribeProvider(),
         transcribe_use_fallback=True,
     )
-    assert provider.transcribe("voice.ogg") == "fallback:voice.ogg"
+    assert provider.transcribe(b"OggS") == "fallback:audio/ogg:4"
 
 
 def test_routed_provider_falls_back_on_generate_stream_error() -> None:
@@ -109,3 +111,25 @@ def test_routed_provider_forwards_reaction_context_to_fallback() -> None:
 
     assert reaction == "😀"
     assert fallback.last_context == "Alice: hi"
+
+
+class _FailWarmUpProvider(_OkProvider):
+    def warm_up(self) -> None:
+        raise RuntimeError("boom")
+
+
+class _CountingWarmUpProvider(_OkProvider):
+    def __init__(self) -> None:
+        self.warm_up_calls = 0
+
+    def warm_up(self) -> None:
+        self.warm_up_calls += 1
+
+
+def test_routed_provider_warm_up_tolerates_failures() -> None:
+    fallback = _CountingWarmUpProvider()
+    provider = RoutedModelProvider(primary=_FailWarmUpProvider(), fallback=fallback)
+
+    provider.warm_up()
+
+    assert fallback.warm_up_calls == 1
@@ -0,0 +1,48 @@
+# pylint: disable=protected-access  # asserts on AIORateLimiter internals
+import asyncio
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+
+from src.rate_limiting import ReplyRateLimiter
+
+
+def _send(limiter: ReplyRateLimiter, endpoint: str, callback) -> object:
+    data = {"chat_id": -100, "text": "hi"}
+    return asyncio.run(limiter.process_request(callback, (), {}, endpoint, data, None))
+
+
+async def _ok() -> bool:
+    return True
+
+
+def test_chat_actions_skip_the_group_limit() -> None:
+    limiter = ReplyRateLimiter()
+
+    assert _send(limiter, "sendChatAction", _ok) is True
+    assert _send(limiter, "setMessageReaction", _ok) is True
+
+    assert not limiter._group_limiters
+
+
+def test_messages_keep_the_group_limit() -> None:
+    limiter = ReplyRateLimiter()
+
+    assert _send(limiter, "sendMessage", _ok) is True
+
+    assert list(limiter._group_limiters) == [-100]
+
+
+def test_retry_after_is_retried() -> None:
+    limiter = ReplyRateLimiter()
+    calls = []
+
+    async def _flaky() -> bool:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RetryAfter(timedelta(0))
+        return True
+
+    assert _send(limiter, "sendMessage", _flaky) is True
+    assert len(calls) == 2
+    assert limiter._max_retries == 2
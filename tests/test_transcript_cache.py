@@ -0,0 +1,51 @@
+import os
+import time
+
+from src import transcript_cache
+
+
+def test_cache_key_depends_on_audio_and_language() -> None:
+    key = transcript_cache.cache_key(b"OggS-one", language="ru")
+
+    assert key == transcript_cache.cache_key(b"OggS-one", language="ru")
+    assert key != transcript_cache.cache_key(b"OggS-two", language="ru")
+    assert key != transcript_cache.cache_key(b"OggS-one", language="en")
+
+
+def test_store_then_load_roundtrip(tmp_path) -> None:
+    cache_dir = str(tmp_path / "transcripts")
+
+    assert transcript_cache.load(cache_dir, "k1") is None
+    transcript_cache.store(cache_dir, "k1", "привет")
+
+    assert transcript_cache.load(cache_dir, "k1") == "привет"
+    assert sorted(p.name for p in (tmp_path / "transcripts").iterdir()) == ["k1.json"]
+
+
+def test_load_ignores_corrupted_entry(tmp_path) -> None:
+    (tmp_path / "bad.json").write_text("{not json", encoding="utf-8")
+
+    assert transcript_cache.load(str(tmp_path), "bad") is None
+
+
+def test_store_prunes_oldest_entries_over_cap(tmp_path) -> None:
+    cache_dir = str(tmp_path)
+    for index, key in enumerate(("k1", "k2", "k3")):
+        transcript_cache.store(cache_dir, key, key, max_entries=2)
+        os.utime(tmp_path / f"{key}.json", (1000 + index, 1000 + index))
+    transcript_cache.store(cache_dir, "k4", "k4", max_entries=2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["k3.json", "k4.json"]
+
+
+def test_expired_entries_are_ignored_and_pruned(tmp_path) -> None:
+    cache_dir = str(tmp_path)
+    transcript_cache.store(cache_dir, "old", "stale")
+    old_mtime = time.time() - 7200
+    os.utime(tmp_path / "old.json", (old_mtime, old_mtime))
+
+    assert transcript_cache.load(cache_dir, "old", max_age_secs=3600) is None
+
+    transcript_cache.store(cache_dir, "new", "fresh", max_age_secs=3600)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new.json"]
@@ -0,0 +1,107 @@
+# pylint: disable=protected-access  # unit tests for private helpers and caches
+import asyncio
+from types import SimpleNamespace
+
+from src.update_processing import ChatOrderedUpdateProcessor
+
+
+def _update(chat_id: int) -> SimpleNamespace:
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=chat_id))
+
+
+def test_updates_run_in_order_per_chat_and_concurrently_across_chats() -> None:
+    events = []
+    slow_chat_started = None
+
+    async def _handle(name: str, delay: float) -> None:
+        events.append(f"start {name}")
+        if name == "a1":
+            slow_chat_started.set()
+        await asyncio.sleep(delay)
+        events.append(f"end {name}")
+
+    async def _run() -> ChatOrderedUpdateProcessor:
+        nonlocal slow_chat_started
+        slow_chat_started = asyncio.Event()
+        processor = ChatOrderedUpdateProcessor(8)
+        first = asyncio.create_task(
+            processor.process_update(_update(1), _handle("a1", 0.05))
+        )
+        second = asyncio.create_task(
+            processor.process_update(_update(1), _handle("a2", 0))
+        )
+        await slow_chat_started.wait()
+        other = asyncio.create_task(
+            processor.process_update(_update(2), _handle("b1", 0))
+        )
+        await asyncio.gather(first, second, other)
+        return processor
+
+    processor = asyncio.run(_run())
+
+    assert events.index("end b1") < events.index("end a1")
+    assert events.index("end a1") < events.index("start a2")
+    assert processor._chat_locks == {}
+    assert processor._chat_pending == {}
+
+
+def test_backlog_in_one_chat_does_not_take_every_slot() -> None:
+    finished = []
+    peak_active = 0
+
+    async def _handle(
+        processor: ChatOrderedUpdateProcessor, name: str, delay: float
+    ) -> None:
+        nonlocal peak_active
+        peak_active = max(peak_active, processor.current_concurrent_updates)
+        await asyncio.sleep(delay)
+        finished.append(name)
+
+    async def _run() -> ChatOrderedUpdateProcessor:
+        processor = ChatOrderedUpdateProcessor(4)
+        tasks = [
+            asyncio.create_task(
+                processor.process_update(_update(1), _handle(processor, f"a{i}", 0.02))
+            )
+            for i in range(6)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(
+            asyncio.create_task(
+                processor.process_update(_update(2), _handle(processor, "b1", 0))
+            )
+        )
+        await asyncio.gather(*tasks)
+        return processor
+
+    processor = asyncio.run(_run())
+
+    assert finished == ["b1"] + [f"a{i}" for i in range(6)]
+    assert processor.max_concurrent_updates == 4
+    assert processor.current_concurrent_updates == 0
+    assert peak_active <= 2
+
+
+def test_limit_applies_to_updates_that_hold_their_chat() -> None:
+    active = 0
+    peak_active = 0
+
+    async def _handle() -> None:
+        nonlocal active, peak_active
+        active += 1
+        peak_active = max(peak_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    async def _run() -> None:
+        processor = ChatOrderedUpdateProcessor(2)
+        await asyncio.gather(
+            *(
+                processor.process_update(_update(chat_id), _handle())
+                for chat_id in range(5)
+            )
+        )
+
+    asyncio.run(_run())
+
+    assert peak_active == 2
@@ -1,3 +1,4 @@
+import json
 import re
 
 from src import utils
@@ -67,3 +68,34 @@ def test_prepare_telegram_html_converts_markdown_headings() -> None:
     assert "<b>Main title</b>" in html_text
     assert "<b>Section</b>" in html_text
     assert "- item" in html_text
+
+
+def test_json_dumps_matches_stdlib_without_orjson(monkeypatch) -> None:
+    payload = {"sender": "Алиса", "text": "привет 👋"}
+    fast = utils.json_dumps(payload)
+    monkeypatch.setattr(utils, "orjson", None)
+    fallback = utils.json_dumps(payload)
+
+    assert fast == fallback
+    assert "Алиса" in fallback
+    assert json.loads(fallback) == payload
+
+
+def test_json_dumps_indent_matches_stdlib_without_orjson(monkeypatch) -> None:
+    payload = {"update_id": 1, "message": {"text": "привет"}}
+    fast = utils.json_dumps(payload, indent=True)
+    monkeypatch.setattr(utils, "orjson", None)
+
+    assert fast == utils.json_dumps(payload, indent=True)
+    assert '\n  "message": {' in fast
+
+
+def test_strip_markdown_to_json_handles_fences() -> None:
+    assert utils.strip_markdown_to_json('```json\n{"a": 1}\n```') == '{"a": 1}'
+    assert utils.strip_markdown_to_json('```\n{"a": 1}\n```') == '{"a": 1}'
+    assert utils.strip_markdown_to_json('  {"a": 1}  ') == '{"a": 1}'
+
+
+def test_loads_model_json_accepts_bare_and_fenced_payloads() -> None:
+    assert utils.loads_model_json('{"a": 1}') == {"a": 1}
+    assert utils.loads_model_json('```json\n{"a": 1}\n```') == {"a": 1}